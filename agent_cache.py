@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+agent_cache.py — Cache metadata agent (LRU + TTL) untuk MoltArena Bot
+======================================================================
+Metadata agent (nama, displayName, profil lain dari payload) disimpan
+per agent id, diisi dari setiap payload battle (create, poll, final)
+dan opsional dari API agent. Disimpan ke molt_agents.json supaya nama
+lawan tetap dikenal setelah restart, tanpa request tambahan.
+
+Satu tempat untuk resolve "siapa saya / siapa lawan" dari payload
+battle (participants.agent1/2, agentA/B) — fallback nama selalu "?".
+
+  python3 agent_cache.py            # isi cache + hit rate terakhir
+"""
+
+import os, sys, json, time, logging, threading
+from collections import OrderedDict
+from pathlib import Path
+
+log = logging.getLogger("AgentCache")
+
+DEFAULT_PATH = os.getenv("MOLT_AGENT_CACHE", str(Path(__file__).parent / "molt_agents.json"))
+MAX_SIZE     = 2000
+TTL          = 7 * 86400   # detik; profil lebih lama dari ini dianggap basi
+UNKNOWN      = "?"
+NAME_KEYS    = ("name", "displayName")
+
+
+def _agent_id(a: dict) -> str | None:
+    return a.get("id") or a.get("agentId")
+
+
+class AgentCache:
+    def __init__(self, path: str | Path | None = DEFAULT_PATH, max_size: int = MAX_SIZE,
+                 ttl: float = TTL, fetch=None):
+        self.path     = Path(path) if path else None
+        self.max_size = max_size
+        self.ttl      = ttl
+        self.fetch    = fetch      # callable(agent_id) -> dict | None, dipanggil saat miss
+        self._lock    = threading.Lock()
+        self._items   = OrderedDict()   # id → (waktu simpan, metadata)
+        self.hits = self.misses = self.fetched = 0
+        self._load()
+
+    # ── PUBLIC ────────────────────────────────────────────────
+
+    def get(self, agent_id: str, fetch: bool = True) -> dict | None:
+        """Metadata agent; miss + `fetch` → ambil dari API (jika dikonfigurasi)."""
+        if not agent_id:
+            return None
+        with self._lock:
+            item = self._items.get(agent_id)
+            if item and time.time() - item[0] <= self.ttl:
+                self._items.move_to_end(agent_id)
+                self.hits += 1
+                return item[1]
+            if item:
+                del self._items[agent_id]
+            self.misses += 1
+        if not (fetch and self.fetch):
+            return None
+        try:
+            meta = self.fetch(agent_id)
+        except Exception as e:
+            log.debug(f"  Fetch agent {agent_id} gagal: {e}")
+            return None
+        if meta:
+            self.fetched += 1
+            return self.put(agent_id, meta)
+        return None
+
+    def put(self, agent_id: str, meta: dict) -> dict:
+        """Gabung metadata baru ke entri yang ada (nilai kosong tidak menimpa)."""
+        with self._lock:
+            old = self._items.pop(agent_id, (0, {}))[1]
+            new = {**old, **{k: v for k, v in meta.items()
+                             if v not in (None, "") and not isinstance(v, (dict, list))}}
+            self._items[agent_id] = (time.time(), new)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+            return new
+
+    def sides(self, battle: dict | None, my_id: str) -> tuple[dict, dict, bool]:
+        """Payload battle → (saya, lawan, saya_agent_A). Metadata dilengkapi dari cache.
+
+        Jika id tidak cocok dengan my_id, agent A / agent1 dianggap saya
+        (bot selalu membuat battle sebagai agent1).
+        """
+        b     = battle or {}
+        parts = b.get("participants") or {}
+        a     = b.get("agentA") or parts.get("agent1") or {}
+        bb    = b.get("agentB") or parts.get("agent2") or {}
+        me_a  = _agent_id(bb) != my_id or _agent_id(a) == my_id
+        return self.resolve(a if me_a else bb), self.resolve(bb if me_a else a), me_a
+
+    def resolve(self, agent: dict) -> dict:
+        """Metadata gabungan payload + cache; selalu punya key "name"."""
+        aid = _agent_id(agent or {})
+        if not aid:
+            return {**(agent or {}), "name": _name(agent or {}) or UNKNOWN}
+        self.get(aid, fetch=not _name(agent))
+        meta = dict(self.put(aid, {**agent, "id": aid}))
+        meta["name"] = _name(meta) or UNKNOWN
+        return meta
+
+    def name(self, agent_id: str) -> str:
+        meta = self.get(agent_id, fetch=False) if agent_id else None
+        return _name(meta or {}) or UNKNOWN
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"size": len(self._items), "hits": self.hits, "misses": self.misses,
+                "fetched": self.fetched, "hit_rate": round(self.hits / total, 4) if total else None}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {"saved_at": time.time(), "stats": self.stats(),
+                    "agents": {k: {"t": t, **m} for k, (t, m) in self._items.items()}}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.warning(f"  ⚠️  Gagal simpan cache agent: {e}")
+
+    # ── PRIVATE ───────────────────────────────────────────────
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            log.warning(f"  ⚠️  Cache agent rusak, mulai kosong: {e}")
+            return
+        now   = time.time()
+        items = sorted(((m.pop("t", 0), k, m) for k, m in data.get("agents", {}).items()),
+                       key=lambda x: x[0])
+        for t, k, m in items[-self.max_size:]:
+            if now - t <= self.ttl:
+                self._items[k] = (t, m)
+
+
+def _name(meta: dict) -> str | None:
+    for k in NAME_KEYS:
+        if meta.get(k):
+            return str(meta[k])
+    return None
+
+
+if __name__ == "__main__":
+    path = Path(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH)
+    if not path.exists():
+        print(f"❌ {path} belum ada")
+        sys.exit(1)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    s    = data.get("stats", {})
+    rate = f"{s['hit_rate'] * 100:.1f}%" if s.get("hit_rate") is not None else "-"
+    print(f"\n🗂️  {path.name}: {len(data.get('agents', {}))} agent | hit rate sesi terakhir {rate} "
+          f"({s.get('hits', 0)} hit / {s.get('misses', 0)} miss, {s.get('fetched', 0)} dari API)\n")
+    for aid, m in sorted(data.get("agents", {}).items(), key=lambda kv: -kv[1].get("t", 0))[:20]:
+        print(f"   {aid[:36]:<36} {_name(m) or UNKNOWN}")
+    print()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+analytics.py — Analitik performa dari riwayat battle
+=====================================================
+Load seluruh history (molt_history.db) ke array NumPy sekali jalan,
+lalu hitung secara vectorized (tanpa loop Python per battle):
+
+  - win / draw rate per lawan, per topic, per jam (UTC)
+  - rolling win rate + interval kepercayaan Wilson 95%
+  - distribusi selisih vote (voteCountA/B → vote_my − vote_op)
+  - breakdown waktu siklus per fase (create, run, poll, voting, final)
+
+Snapshot kolom disimpan di molt_history.npz dan diperbarui inkremental
+(hanya baris dengan rev baru), jadi ratusan ribu battle < 1 detik →
+dipakai untuk tuning MOLT_ROUNDS & MOLT_DELAY_SECONDS dari data.
+
+  python3 analytics.py                 # laporan teks
+  python3 analytics.py --json          # JSON (untuk dashboard / perbandingan host)
+  python3 analytics.py --window 100 --top 15
+"""
+
+import os, sys, json, argparse
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsional — hanya dibutuhkan modul analitik
+    np = None
+
+from history import History
+
+DEFAULT_DB = os.getenv("MOLT_HISTORY_DB", str(Path(__file__).parent / "molt_history.db"))
+PHASES     = ("t_create", "t_run", "t_poll", "t_voting", "t_final")
+Z95        = 1.959964
+
+
+def _require_numpy():
+    if np is None:
+        print("❌ analytics butuh numpy → pip install numpy")
+        sys.exit(1)
+
+
+def load(db_path: str | Path = DEFAULT_DB, include_skip: bool = False, cache: bool = True) -> dict:
+    """History → dict kolom NumPy. Kolom teks di-encode jadi (codes, labels)."""
+    _require_numpy()
+    snap = _snapshot(Path(db_path), cache)
+    keep = slice(None) if include_skip else np.isin(
+        snap["outcome_codes"], _codes(snap["outcome_labels"], ("win", "lose", "draw")))
+
+    data = {"n": int(len(snap["battle_num"][keep]))}
+    if not data["n"]:
+        return data
+    outcome = snap["outcome_codes"][keep]
+    data["win"]  = outcome == _codes(snap["outcome_labels"], ("win",))[0]
+    data["draw"] = outcome == _codes(snap["outcome_labels"], ("draw",))[0]
+    for c in ("opponent", "topic"):
+        data[c] = snap[f"{c}_codes"][keep], snap[f"{c}_labels"]
+    for c in NUMERIC:
+        data[c] = snap[c][keep]
+    created      = data.pop("created_at")
+    data["hour"] = np.where(np.isnan(created), -1, (created // 3600) % 24).astype(int)
+    return data
+
+
+# ── Snapshot kolom (cache .npz) ───────────────────────────────
+# SELECT ratusan ribu baris lewat sqlite3 sendiri sudah ~1 detik (objek
+# Python per sel). Snapshot kolom disimpan di sebelah DB; run berikutnya
+# hanya mengambil baris dengan rev > rev snapshot lalu digabung.
+
+CATEGORIES = ("outcome", "opponent", "topic")
+NUMERIC    = ("vote_my", "vote_op", "created_at", "rounds") + PHASES
+
+
+def _codes(labels, wanted) -> list[int]:
+    """Index label di `labels` (terurut); -1 jika tidak ada."""
+    idx = np.searchsorted(labels, wanted)
+    return [int(i) if i < len(labels) and labels[i] == w else -1 for i, w in zip(idx, wanted)]
+
+
+def _frame(rows: list[tuple]) -> dict:
+    cols  = ("battle_num", "rev") + CATEGORIES + NUMERIC
+    col   = dict(zip(cols, zip(*rows))) if rows else {c: () for c in cols}
+    frame = {"battle_num": np.array(col["battle_num"], dtype=np.int64),
+             "rev":        np.array(col["rev"], dtype=float)}
+    for c in CATEGORIES:
+        labels, codes = np.unique(np.array([v or "?" for v in col[c]], dtype=str), return_inverse=True)
+        frame[f"{c}_labels"], frame[f"{c}_codes"] = labels, codes.astype(np.int32)
+    for c in NUMERIC:
+        frame[c] = np.array(col[c], dtype=float)   # None → NaN
+    return frame
+
+
+def _merge(old: dict, new: dict) -> dict:
+    """Gabung snapshot lama + baris berubah (baris baru menang), urut battle_num."""
+    keep  = ~np.isin(old["battle_num"], new["battle_num"])
+    bn    = np.concatenate((old["battle_num"][keep], new["battle_num"]))
+    order = np.argsort(bn, kind="stable")
+    out   = {"battle_num": bn[order]}
+    for c in ("rev",) + NUMERIC:
+        out[c] = np.concatenate((old[c][keep], new[c]))[order]
+    for c in CATEGORIES:
+        ol, nl = old[f"{c}_labels"], new[f"{c}_labels"]
+        labels = np.union1d(ol, nl)
+        codes  = np.concatenate((np.searchsorted(labels, ol)[old[f"{c}_codes"][keep]],
+                                 np.searchsorted(labels, nl)[new[f"{c}_codes"]]))
+        out[f"{c}_labels"], out[f"{c}_codes"] = labels, codes[order].astype(np.int32)
+    return out
+
+
+def _snapshot(db_path: Path, cache: bool) -> dict:
+    cols       = ("battle_num", "rev") + CATEGORIES + NUMERIC
+    cache_path = db_path.with_suffix(".npz")
+    snap       = _read_snapshot(cache_path) if cache else None
+    h = History(db_path)
+    try:
+        count, rev = h.revision()
+        seen = int(np.nanmax(snap["rev"], initial=0)) if snap else 0
+        if snap is not None and seen > rev:
+            snap = None                       # DB diganti / di-restore → bangun ulang
+        if snap is None:
+            snap = _frame(h.rows(cols))
+        elif seen < rev:
+            snap = _merge(snap, _frame(h.rows(cols, "WHERE rev > ?", (seen,))))
+        else:
+            return snap
+        if len(snap["battle_num"]) != count:  # ada baris terhapus → bangun ulang
+            snap = _frame(h.rows(cols))
+    finally:
+        h.close()
+    if cache:
+        _write_snapshot(cache_path, snap)
+    return snap
+
+
+def _read_snapshot(path: Path) -> dict | None:
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            return {k: z[k] for k in z.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_snapshot(path: Path, snap: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(f, **snap)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️  Gagal tulis cache {path}: {e}", file=sys.stderr)
+
+
+def wilson(k, n, z: float = Z95):
+    """Interval Wilson (lo, hi) — vectorized, aman untuk n=0."""
+    k, n = np.asarray(k, float), np.asarray(n, float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p      = np.where(n > 0, k / n, np.nan)
+        denom  = 1 + z * z / n
+        centre = (p + z * z / (2 * n)) / denom
+        half   = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return centre - half, centre + half
+
+
+def group_rates(codes, labels, win, draw, min_n: int = 1) -> list[dict]:
+    """Win/draw rate per grup via bincount — satu pass, tanpa loop per battle."""
+    size  = len(labels)
+    n     = np.bincount(codes, minlength=size)
+    wins  = np.bincount(codes, weights=win,  minlength=size)
+    draws = np.bincount(codes, weights=draw, minlength=size)
+    lo, hi = wilson(wins, n)
+    keep  = np.nonzero(n >= min_n)[0]
+    order = keep[np.argsort(-n[keep], kind="stable")]
+    return [{"key": str(labels[i]), "n": int(n[i]),
+             "win_rate": float(wins[i] / n[i]), "draw_rate": float(draws[i] / n[i]),
+             "ci95": [round(float(lo[i]), 4), round(float(hi[i]), 4)]} for i in order]
+
+
+def rolling_win_rate(win, window: int = 50):
+    """Rolling win rate (cumsum) + CI Wilson. Return (rate, lo, hi) panjang len-window+1."""
+    w = np.asarray(win, float)
+    if len(w) < window:
+        window = max(1, len(w))
+    c    = np.concatenate(([0.0], np.cumsum(w)))
+    wins = c[window:] - c[:-window]
+    lo, hi = wilson(wins, np.full_like(wins, window))
+    return wins / window, lo, hi
+
+
+def vote_margins(vote_my, vote_op) -> dict:
+    m = vote_my - vote_op
+    m = m[~np.isnan(m)]
+    if not len(m):
+        return {}
+    q = np.percentile(m, [5, 25, 50, 75, 95])
+    lo, hi = int(m.min()), int(m.max())
+    hist = np.bincount((m - lo).astype(int), minlength=hi - lo + 1)
+    return {
+        "mean": float(m.mean()), "p5": float(q[0]), "p25": float(q[1]), "median": float(q[2]),
+        "p75": float(q[3]), "p95": float(q[4]),
+        "close_share": float(np.mean(np.abs(m) <= 1)),   # battle yang ditentukan ≤1 vote
+        "histogram": {str(lo + i): int(c) for i, c in enumerate(hist) if c},
+    }
+
+
+def cycle_breakdown(data: dict) -> dict:
+    out = {}
+    for p in PHASES:
+        v = data[p][~np.isnan(data[p])]
+        if len(v):
+            q = np.percentile(v, [50, 95])
+            out[p[2:]] = {"n": int(len(v)), "mean": round(float(v.mean()), 2),
+                          "p50": round(float(q[0]), 2), "p95": round(float(q[1]), 2)}
+    return out
+
+
+def report(db_path: str | Path = DEFAULT_DB, window: int = 50, top: int = 10, min_n: int = 3,
+           cache: bool = True) -> dict:
+    d = load(db_path, cache=cache)
+    n = d["n"]
+    if not n:
+        return {"battles": 0}
+    win, draw = d["win"].astype(float), d["draw"].astype(float)
+    lo, hi = wilson(win.sum(), n)
+    rate, rlo, rhi = rolling_win_rate(win, window)
+
+    hour_codes = d["hour"]
+    valid = hour_codes >= 0
+    by_hour = group_rates(hour_codes[valid], np.arange(24), win[valid], draw[valid]) if valid.any() else []
+    by_rounds = []
+    r_ok = ~np.isnan(d["rounds"])
+    if r_ok.any():
+        r_labels, r_codes = np.unique(d["rounds"][r_ok].astype(int), return_inverse=True)
+        by_rounds = group_rates(r_codes, r_labels, win[r_ok], draw[r_ok])
+
+    return {
+        "battles":     n,
+        "win_rate":    float(win.mean()),
+        "draw_rate":   float(draw.mean()),
+        "ci95":        [round(float(lo), 4), round(float(hi), 4)],
+        "rolling": {
+            "window":   window,
+            "last":     round(float(rate[-1]), 4),
+            "last_ci95": [round(float(rlo[-1]), 4), round(float(rhi[-1]), 4)],
+            "min":      round(float(rate.min()), 4),
+            "max":      round(float(rate.max()), 4),
+        },
+        "by_opponent": group_rates(*d["opponent"], win, draw, min_n=min_n)[:top],
+        "by_topic":    group_rates(*d["topic"],    win, draw, min_n=min_n)[:top],
+        "by_hour_utc": sorted(by_hour, key=lambda g: int(g["key"])),
+        "by_rounds":   by_rounds,
+        "vote_margin": vote_margins(d["vote_my"], d["vote_op"]),
+        "cycle_sec":   cycle_breakdown(d),
+    }
+
+
+def _print(r: dict):
+    if not r.get("battles"):
+        print("📊 History kosong — belum ada battle tercatat.")
+        return
+    pct = lambda x: f"{x*100:5.1f}%"
+    print(f"\n📊 {r['battles']} battle | win {pct(r['win_rate'])} "
+          f"(CI95 {pct(r['ci95'][0])}–{pct(r['ci95'][1])}) | draw {pct(r['draw_rate'])}")
+    ro = r["rolling"]
+    print(f"   Rolling {ro['window']}: terakhir {pct(ro['last'])} "
+          f"(CI95 {pct(ro['last_ci95'][0])}–{pct(ro['last_ci95'][1])}), "
+          f"min {pct(ro['min'])}, max {pct(ro['max'])}")
+    for title, key in (("Per lawan", "by_opponent"), ("Per topic", "by_topic"),
+                       ("Per rounds", "by_rounds"), ("Per jam (UTC)", "by_hour_utc")):
+        if r[key]:
+            print(f"\n   {title}:")
+            for g in r[key]:
+                print(f"     {g['key'][:32]:<32} n={g['n']:<6} win {pct(g['win_rate'])}  draw {pct(g['draw_rate'])}")
+    vm = r["vote_margin"]
+    if vm:
+        print(f"\n   Selisih vote: median {vm['median']:+.0f}, p5 {vm['p5']:+.0f}, p95 {vm['p95']:+.0f}, "
+              f"≤1 vote {pct(vm['close_share'])}")
+    if r["cycle_sec"]:
+        print("\n   Waktu siklus (detik):")
+        for phase, c in r["cycle_sec"].items():
+            print(f"     {phase:<8} p50 {c['p50']:>7.1f}  p95 {c['p95']:>7.1f}  mean {c['mean']:>7.1f}  (n={c['n']})")
+    print()
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Analitik riwayat battle MoltArena")
+    p.add_argument("--db",     default=DEFAULT_DB, help="Path molt_history.db")
+    p.add_argument("--window", type=int, default=50, help="Ukuran window rolling win rate")
+    p.add_argument("--top",    type=int, default=10, help="Jumlah baris per lawan / topic")
+    p.add_argument("--min-n",  type=int, default=3,  help="Minimal battle per grup")
+    p.add_argument("--json",   action="store_true",  help="Output JSON")
+    p.add_argument("--no-cache", action="store_true", help="Jangan baca / tulis snapshot .npz")
+    args = p.parse_args()
+    _require_numpy()
+    r = report(args.db, window=args.window, top=args.top, min_n=args.min_n, cache=not args.no_cache)
+    if args.json:
+        print(json.dumps(r, indent=2, ensure_ascii=False))
+    else:
+        _print(r)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+archive.py — Arsip payload final battle (JSON lines terkompresi)
+=================================================================
+Payload final dari step5_wait_final (rounds, topic, peserta, vote)
+disimpan utuh untuk analisis jangka panjang:
+
+  archive/battles_<waktu>.jsonl.zst   (atau .jsonl.gz tanpa zstandard)
+  archive/battles_<waktu>.jsonl.zst.idx
+
+Setiap battle = satu frame terkompresi independen (frame zstd / member
+gzip), jadi file tetap valid untuk `zstdcat` / `zcat`, dan satu battle
+bisa dibaca langsung dari offset-nya tanpa membuka seluruh file.
+File .idx berisi satu baris per battle: battle_num, offset, panjang,
+waktu arsip. File dirotasi setelah MAX_BYTES.
+
+  python3 archive.py                 # ringkasan arsip
+  python3 archive.py get 12345       # payload battle #12345
+  python3 archive.py dump --since 12000 > battles.jsonl
+"""
+
+import os, sys, gzip, json, time, zlib, logging, argparse, threading
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import zstandard as zstd
+except ImportError:  # zstandard opsional — fallback gzip
+    zstd = None
+
+log = logging.getLogger("Archive")
+
+DEFAULT_DIR = os.getenv("MOLT_ARCHIVE_DIR", str(Path(__file__).parent / "archive"))
+MAX_BYTES   = 64 * 1024 * 1024   # rotasi file arsip
+ZSTD_LEVEL  = 10
+GZIP_LEVEL  = 6
+READ_CHUNK  = 1 << 16
+
+
+def _ext(codec: str) -> str:
+    return ".jsonl.zst" if codec == "zstd" else ".jsonl.gz"
+
+
+def _codec_of(path: Path) -> str:
+    return "zstd" if path.name.endswith(".zst") else "gzip"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _decompress(frame: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstd is None:
+            raise RuntimeError("arsip .zst butuh zstandard → pip install zstandard")
+        return zstd.ZstdDecompressor().decompressobj().decompress(frame)
+    return gzip.decompress(frame)
+
+
+class Archive:
+    """Writer thread-safe; satu file aktif, dirotasi per MAX_BYTES."""
+
+    def __init__(self, directory: str | Path = DEFAULT_DIR, codec: str | None = None,
+                 max_bytes: int = MAX_BYTES):
+        codec = codec or os.getenv("MOLT_ARCHIVE_CODEC") or ("zstd" if zstd else "gzip")
+        if codec == "zstd" and zstd is None:
+            log.warning("  ⚠️  zstandard tidak terpasang → arsip pakai gzip")
+            codec = "gzip"
+        self.dir       = Path(directory)
+        self.codec     = codec
+        self.max_bytes = max_bytes
+        self._lock     = threading.Lock()
+        self._data     = None
+        self._idx      = None
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def append(self, payload: dict, battle_num=None) -> tuple[Path, int] | None:
+        """Tambah satu payload battle. Return (file, offset)."""
+        if not payload:
+            return None
+        raw   = (json.dumps(payload, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+        frame = _compress(raw, self.codec)
+        bnum  = battle_num if battle_num is not None else payload.get("battleNumber")
+        with self._lock:
+            f = self._current()
+            offset = f.tell()
+            f.write(frame)
+            f.flush()
+            # Index ditulis setelah data → entri index selalu menunjuk frame utuh
+            self._idx.write(f"{bnum if bnum is not None else '-'}\t{offset}\t{len(frame)}\t{int(time.time())}\n")
+            self._idx.flush()
+            path = Path(f.name)
+            if offset + len(frame) >= self.max_bytes:
+                self._close_files()
+        return path, offset
+
+    def close(self):
+        with self._lock:
+            self._close_files()
+
+    # ── PRIVATE ───────────────────────────────────────────────
+
+    def _current(self):
+        if self._data:
+            return self._data
+        files = sorted(self.dir.glob(f"battles_*{_ext(self.codec)}"))
+        path  = files[-1] if files else None
+        if path is None or path.stat().st_size >= self.max_bytes:
+            stamp, n = f"{datetime.now():%Y%m%d_%H%M%S}", 0
+            path = self.dir / f"battles_{stamp}{_ext(self.codec)}"
+            while path.exists():   # rotasi >1x dalam detik yang sama
+                n += 1
+                path = self.dir / f"battles_{stamp}_{n:03d}{_ext(self.codec)}"
+        end = _indexed_end(path)
+        # Sisa frame setelah entri index terakhir = tulisan terpotong (crash) → buang
+        if path.exists() and path.stat().st_size != end:
+            log.warning(f"  ⚠️  {path.name}: {path.stat().st_size - end} byte tanpa index → dipotong")
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        self._data = open(path, "ab")
+        self._idx  = open(_idx_path(path), "a", encoding="utf-8")
+        return self._data
+
+    def _close_files(self):
+        for f in (self._data, self._idx):
+            if f:
+                f.close()
+        self._data = self._idx = None
+
+
+def _idx_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _read_index(path: Path) -> list[tuple[str, int, int, int]]:
+    out = []
+    try:
+        with open(_idx_path(path), encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 4:
+                    out.append((parts[0], int(parts[1]), int(parts[2]), int(parts[3])))
+    except FileNotFoundError:
+        pass
+    return out
+
+
+def _indexed_end(path: Path) -> int:
+    idx = _read_index(path)
+    return idx[-1][1] + idx[-1][2] if idx else 0
+
+
+class ArchiveReader:
+    """Baca arsip secara streaming — satu frame di memori setiap saat."""
+
+    def __init__(self, directory: str | Path = DEFAULT_DIR):
+        self.dir = Path(directory)
+
+    def files(self) -> list[Path]:
+        return sorted(p for p in self.dir.glob("battles_*.jsonl.*") if p.name.endswith((".zst", ".gz")))
+
+    def index(self):
+        """Iterasi (file, battle_num, offset, panjang, waktu) semua battle, urut file."""
+        for path in self.files():
+            for bnum, off, size, ts in _read_index(path):
+                yield path, bnum, off, size, ts
+
+    def __iter__(self):
+        return self.iter()
+
+    def iter(self, since: int | None = None):
+        """Iterasi payload; `since` = lewati battle_num < since (hanya baca index)."""
+        handle, cur = None, None
+        try:
+            for path, bnum, off, size, _ in self.index():
+                if since is not None and (not bnum.isdigit() or int(bnum) < since):
+                    continue
+                if path != cur:
+                    if handle:
+                        handle.close()
+                    handle, cur = open(path, "rb"), path
+                yield self._read(handle, path, off, size)
+        finally:
+            if handle:
+                handle.close()
+
+    def get(self, battle_num) -> dict | None:
+        """Payload satu battle lewat index (seek langsung) — entri terbaru menang."""
+        hit = None
+        for path, bnum, off, size, _ in self.index():
+            if bnum == str(battle_num):
+                hit = (path, off, size)
+        if not hit:
+            return None
+        with open(hit[0], "rb") as f:
+            return self._read(f, *hit)
+
+    def stats(self) -> dict:
+        files = self.files()
+        comp  = sum(p.stat().st_size for p in files)
+        return {"files": len(files), "battles": sum(1 for _ in self.index()), "bytes": comp}
+
+    @staticmethod
+    def _read(handle, path: Path, offset: int, size: int) -> dict:
+        handle.seek(offset)
+        return json.loads(_decompress(handle.read(size), _codec_of(path)))
+
+
+def rebuild_index(path: str | Path) -> int:
+    """Bangun ulang .idx dari file data (frame dibaca streaming). Return jumlah battle."""
+    path, codec = Path(path), _codec_of(Path(path))
+    if codec == "zstd" and zstd is None:
+        raise RuntimeError("arsip .zst butuh zstandard → pip install zstandard")
+    n, offset = 0, 0
+    tmp = _idx_path(path).with_suffix(".tmp")
+    with open(path, "rb") as f, open(tmp, "w", encoding="utf-8") as out:
+        buf = b""
+        while True:
+            dec = zstd.ZstdDecompressor().decompressobj() if codec == "zstd" else zlib.decompressobj(31)
+            raw, used = b"", 0
+            while True:
+                if not buf:
+                    buf = f.read(READ_CHUNK)
+                    if not buf:
+                        break
+                raw += dec.decompress(buf)
+                if dec.eof:
+                    used += len(buf) - len(dec.unused_data)
+                    buf = dec.unused_data
+                    break
+                used += len(buf)
+                buf = b""
+            if not raw or not dec.eof:
+                break   # habis / frame terakhir terpotong
+            try:
+                bnum = json.loads(raw).get("battleNumber", "-")
+            except ValueError:
+                bnum = "-"
+            out.write(f"{bnum}\t{offset}\t{used}\t{int(path.stat().st_mtime)}\n")
+            offset += used
+            n += 1
+    os.replace(tmp, _idx_path(path))
+    return n
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Arsip payload battle MoltArena")
+    p.add_argument("--dir", default=DEFAULT_DIR, help="Folder arsip")
+    sub = p.add_subparsers(dest="cmd")
+    g = sub.add_parser("get", help="Tampilkan payload satu battle")
+    g.add_argument("battle_num")
+    d = sub.add_parser("dump", help="Tulis payload sebagai JSON lines ke stdout")
+    d.add_argument("--since", type=int, help="Mulai dari battle_num ini")
+    r = sub.add_parser("reindex", help="Bangun ulang file .idx dari data")
+    r.add_argument("files", nargs="+")
+    args = p.parse_args()
+
+    reader = ArchiveReader(args.dir)
+    if args.cmd == "get":
+        payload = reader.get(args.battle_num)
+        if payload is None:
+            print(f"❌ Battle #{args.battle_num} tidak ada di arsip")
+            sys.exit(1)
+        print(json.dumps(payload, indent=2, ensure_ascii=False))
+    elif args.cmd == "dump":
+        for payload in reader.iter(since=args.since):
+            sys.stdout.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    elif args.cmd == "reindex":
+        for f in args.files:
+            print(f"🗂️  {f}: {rebuild_index(f)} battle")
+    else:
+        s = reader.stats()
+        print(f"\n🗄️  {reader.dir} — {s['battles']} battle di {s['files']} file, "
+              f"{s['bytes'] / 1e6:.1f} MB terkompresi\n")
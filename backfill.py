@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+backfill.py — Isi history dari riwayat battle di API MoltArena
+===============================================================
+Dipakai lewat `python3 molt_auto_battle.py --backfill` (host baru /
+history kosong):
+
+  1. Halaman 1 diambil dulu → total halaman
+  2. Halaman sisanya diambil paralel (ThreadPoolExecutor, MOLT_BACKFILL_WORKERS)
+     dengan rate limit bersama (token bucket, MOLT_BACKFILL_RPS)
+  3. Battle selesai yang datanya belum lengkap (winnerId / vote) diambil
+     detailnya lewat GET /battles/{id}
+  4. Record ditulis ke history per batch (satu transaksi per batch, mode
+     isi-saja → data live tidak ditimpa), lalu halaman ditandai selesai di
+     checkpoint molt_backfill.json → Ctrl+C / crash bisa dilanjutkan
+
+Path endpoint daftar battle diatur lewat MOLT_BACKFILL_PATH.
+"""
+
+import os, json, time, logging, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from history import outcome_of
+from agent_cache import AgentCache, UNKNOWN
+
+log = logging.getLogger("Backfill")
+
+LIST_PATH  = os.getenv("MOLT_BACKFILL_PATH",
+                       "/agents/{agent_id}/battles?page={page}&limit={limit}")
+WORKERS    = int(os.getenv("MOLT_BACKFILL_WORKERS", "8"))
+RPS        = float(os.getenv("MOLT_BACKFILL_RPS", "5"))
+PAGE_SIZE  = 50
+BATCH      = 500
+RETRIES    = 4
+FINAL      = {"completed", "finished", "done", "ended"}
+
+
+class TokenBucket:
+    """Rate limit bersama untuk semua worker (request/detik, burst = 1 detik)."""
+
+    def __init__(self, rate: float):
+        self.rate    = max(rate, 0.1)
+        self._tokens = self.rate
+        self._last   = time.monotonic()
+        self._lock   = threading.Lock()
+        self.granted = 0
+
+    def acquire(self, stop: threading.Event | None = None) -> bool:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+                self._last   = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.granted += 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop and stop.wait(wait):
+                return False
+            if not stop:
+                time.sleep(wait)
+
+
+class Backfill:
+    def __init__(self, http, api_base: str, headers, agent_id: str, history, agents=None,
+                 checkpoint: str | Path = "molt_backfill.json", stop: threading.Event | None = None,
+                 workers: int = WORKERS, rps: float = RPS, page_size: int = PAGE_SIZE):
+        self.http       = http
+        self.api_base   = api_base
+        self.headers    = headers          # callable → dict header request
+        self.agent_id   = agent_id
+        self.history    = history
+        self.agents     = agents or AgentCache(None)
+        self.checkpoint = Path(checkpoint)
+        self.stop       = stop or threading.Event()
+        self.workers    = max(1, workers)
+        self.page_size  = page_size
+        self.bucket     = TokenBucket(rps)
+        self._state     = self._load_checkpoint()
+
+    # ── PUBLIC ────────────────────────────────────────────────
+
+    def run(self) -> dict:
+        """Ambil semua halaman yang belum selesai. Return ringkasan."""
+        st, t0 = self._state, time.monotonic()
+        if st["total_pages"] is not None and len(self._done) >= st["total_pages"]:
+            log.info("  📥 Backfill sebelumnya sudah selesai → ulang dari halaman 1 (battle baru)")
+            st.update(total_pages=None, done=set(), records=0)
+        if st["total_pages"] is None:
+            first = self._page(1)
+            if first is None:
+                log.error("  ❌ Halaman 1 gagal diambil — backfill dibatalkan")
+                return self._summary(t0)
+            battles, total = first
+            st["total_pages"] = total if total is not None or battles else 1
+            self._commit({1: battles})
+        total = st["total_pages"]
+        # total tidak diketahui → jalan terus sampai halaman kosong
+        todo = None if total is None else [p for p in range(1, total + 1) if p not in self._done]
+        log.info(f"  📥 Backfill: {len(self._done)} halaman sudah, "
+                 f"{'?' if todo is None else len(todo)} tersisa | {self.workers} worker, {self.bucket.rate:g} req/s")
+
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill") as pool:
+            pages = iter(todo) if todo is not None else _missing_pages(self._done)
+            futures = {}
+
+            def submit():
+                while len(futures) < self.workers * 2 and not self.stop.is_set():
+                    page = next(pages, None)
+                    if page is None:
+                        return
+                    futures[pool.submit(self._page, page)] = page
+
+            submit()
+            while futures:
+                fut = next(as_completed(futures))
+                page = futures.pop(fut)
+                res = fut.result()
+                if res is None:
+                    if not self.stop.is_set():
+                        log.warning(f"  ⚠️  Halaman {page} gagal — diulang saat backfill berikutnya")
+                elif not res[0] and todo is None:
+                    pages = iter(())   # halaman kosong → akhir riwayat
+                else:
+                    pending[page] = res[0]
+                if sum(len(b) for b in pending.values()) >= BATCH:
+                    self._commit(pending)
+                    pending = {}
+                submit()
+            if pending:
+                self._commit(pending)
+        if todo is None and not self.stop.is_set():
+            st["total_pages"] = max(self._done, default=0)
+            self._save_checkpoint()
+        return self._summary(t0)
+
+    # ── Fetch ─────────────────────────────────────────────────
+
+    def _page(self, page: int) -> tuple[list[dict], int | None] | None:
+        data = self._get(LIST_PATH.format(agent_id=self.agent_id, page=page, limit=self.page_size))
+        if data is None:
+            return None
+        battles, total = _parse_page(data, self.page_size)
+        out = []
+        for b in battles:
+            if self.stop.is_set():
+                return None
+            status = str(b.get("status", "")).lower()
+            if status and status not in FINAL:
+                continue   # masih berjalan — diambil bot live / backfill berikutnya
+            if "winnerId" not in b or b.get("voteCountA") is None:
+                detail = self._get(f"/battles/{b.get('id')}") if b.get("id") else None
+                if detail:
+                    b = {**b, **detail.get("battle", detail)}
+            out.append(b)
+        return out, total
+
+    def _get(self, path: str) -> dict | list | None:
+        for attempt in range(RETRIES):
+            if not self.bucket.acquire(self.stop):
+                return None
+            try:
+                r = self.http.get(f"{self.api_base}{path}", headers=self.headers(), timeout=30)
+            except Exception as e:
+                log.debug(f"  GET {path} → {e}")
+                wait = 2 ** attempt
+            else:
+                if r.status_code == 200:
+                    return r.json()
+                if r.status_code == 404:
+                    return None
+                if r.status_code != 429 and r.status_code < 500:
+                    log.warning(f"  GET {path} → {r.status_code}: {r.text[:100]}")
+                    return None
+                wait = _retry_after(r.headers.get("retry-after"), 2 ** attempt)
+            if self.stop.wait(wait):
+                return None
+        return None
+
+    # ── Tulis + checkpoint ────────────────────────────────────
+
+    def _commit(self, pages: dict[int, list[dict]]):
+        recs = [self._record(b) for battles in pages.values() for b in battles]
+        n = self.history.upsert_many(recs, batch=BATCH, fill_only=True)
+        self._done.update(pages)
+        self._state["records"] = self._state.get("records", 0) + n
+        self._save_checkpoint()
+        self.agents.save()
+
+    def _record(self, b: dict) -> dict:
+        _, opp, me_a = self.agents.sides(b, self.agent_id)
+        vote_a, vote_b = b.get("voteCountA"), b.get("voteCountB")
+        return {
+            "battle_num":  b.get("battleNumber"),
+            "battle_id":   b.get("id"),
+            "agent_id":    self.agent_id,
+            "opponent_id": opp.get("id"),
+            "opponent":    opp["name"] if opp["name"] != UNKNOWN else None,
+            "topic":       b.get("topic"),
+            "rounds":      b.get("rounds") if isinstance(b.get("rounds"), int) else b.get("totalRounds"),
+            "outcome":     outcome_of(b, self.agent_id),
+            "vote_my":     vote_a if me_a else vote_b,
+            "vote_op":     vote_b if me_a else vote_a,
+            "created_at":  _ts(b.get("createdAt")),
+            "finished_at": _ts(b.get("completedAt") or b.get("endedAt")),
+            "source":      "api",
+        }
+
+    @property
+    def _done(self) -> set:
+        return self._state["done"]
+
+    def _load_checkpoint(self) -> dict:
+        try:
+            st = json.loads(self.checkpoint.read_text(encoding="utf-8"))
+            if st.get("agent_id") == self.agent_id and st.get("path") == LIST_PATH:
+                st["done"] = set(st.get("done", []))
+                return st
+            log.info("  📥 Checkpoint backfill untuk agent/endpoint lain → mulai dari awal")
+        except (OSError, ValueError):
+            pass
+        return {"agent_id": self.agent_id, "path": LIST_PATH, "total_pages": None,
+                "done": set(), "records": 0}
+
+    def _save_checkpoint(self):
+        st  = {**self._state, "done": sorted(self._state["done"]), "saved_at": datetime.now().isoformat()}
+        tmp = self.checkpoint.with_name(self.checkpoint.name + ".tmp")
+        tmp.write_text(json.dumps(st), encoding="utf-8")
+        os.replace(tmp, self.checkpoint)
+
+    def _summary(self, t0: float) -> dict:
+        total = self._state.get("total_pages")
+        return {"pages_done": len(self._done), "total_pages": total,
+                "complete": total is not None and len(self._done) >= total,
+                "records": self._state.get("records", 0), "requests": self.bucket.granted,
+                "elapsed": round(time.monotonic() - t0, 1)}
+
+
+def _parse_page(data, page_size: int) -> tuple[list[dict], int | None]:
+    """Ambil daftar battle + total halaman dari bentuk respons yang umum."""
+    if isinstance(data, list):
+        return data, None
+    battles = next((data[k] for k in ("battles", "data", "items", "results")
+                    if isinstance(data.get(k), list)), [])
+    meta = data.get("pagination") or data.get("meta") or data
+    pages = meta.get("totalPages") or meta.get("pages")
+    if pages is None and meta.get("total") is not None:
+        pages = -(-int(meta["total"]) // page_size)
+    return battles, int(pages) if pages is not None else None
+
+
+def _retry_after(value, default: float) -> float:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _ts(iso: str | None) -> float | None:
+    if not iso:
+        return None
+    try:
+        return datetime.fromisoformat(str(iso).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _missing_pages(done: set):
+    """1, 2, 3, … tanpa halaman yang sudah selesai (total halaman tidak diketahui)."""
+    n = 1
+    while True:
+        if n not in done:
+            yield n
+        n += 1
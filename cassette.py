@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+cassette.py — Record / Replay HTTP untuk MoltArena Bot
+=======================================================
+Rekam traffic asli (create, run, poll, vote, final, Supabase refresh)
+ke file cassette, lalu jalankan ulang main() tanpa network.
+
+  --record FILE   → RecordingAdapter di-mount ke requests.Session bot,
+                    setiap request/response ditulis 1 baris JSON (gzip)
+  --replay FILE   → ReplayAdapter menjawab dari cassette, urut per
+                    (method, path) → deterministik, secepat CPU
+
+Kredensial di-scrub saat rekam: header request tidak disimpan sama sekali,
+Set-Cookie dibuang, field token / email di body JSON diganti "***".
+
+Format (gzip JSON lines):
+  baris 1 : {"cassette": 1, "recorded_at": ..., "config": {...}}
+  baris N : {"t": detik sejak mulai, "method", "url", "req", "status",
+             "ctype", "body", "elapsed_ms"}
+"""
+
+import sys, gzip, json, time, logging, threading
+from collections import defaultdict, deque, Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+log = logging.getLogger("Cassette")
+
+VERSION    = 1
+SCRUB      = "***"
+SCRUB_KEYS = {"access_token", "refresh_token", "provider_token", "provider_refresh_token",
+              "token", "api_key", "apikey", "authorization", "cookie", "email", "phone"}
+
+
+def _scrub(obj):
+    if isinstance(obj, dict):
+        return {k: SCRUB if k.lower() in SCRUB_KEYS else _scrub(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_scrub(v) for v in obj]
+    return obj
+
+
+def _scrub_body(body: bytes | str | None, ctype: str = "application/json") -> str:
+    if not body:
+        return ""
+    text = body.decode("utf-8", errors="replace") if isinstance(body, bytes) else body
+    if "json" not in ctype:
+        return text
+    try:
+        return json.dumps(_scrub(json.loads(text)), separators=(",", ":"))
+    except ValueError:
+        return text
+
+
+def _scrub_url(url: str) -> str:
+    u = urlsplit(url)
+    query = urlencode([(k, SCRUB if k.lower() in SCRUB_KEYS else v) for k, v in parse_qsl(u.query)])
+    return u._replace(query=query).geturl()
+
+
+def _key(method: str, url: str) -> tuple[str, str]:
+    u = urlsplit(url)
+    return method.upper(), f"{u.netloc}{u.path}"
+
+
+# ── Record ────────────────────────────────────────────────────
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTPAdapter biasa yang juga menulis setiap interaksi ke cassette."""
+
+    def __init__(self, path: str | Path, config: dict | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path   = Path(path)
+        self._lock  = threading.Lock()
+        self._t0    = time.monotonic()
+        self._file  = gzip.open(self.path, "wt", encoding="utf-8")
+        self._write({"cassette": VERSION, "recorded_at": datetime.now().isoformat(),
+                     "config": config or {}})
+
+    def send(self, request, **kwargs):
+        t = time.monotonic() - self._t0
+        r = super().send(request, **kwargs)
+        ctype = r.headers.get("content-type", "")
+        self._write({
+            "t":          round(t, 3),
+            "method":     request.method,
+            "url":        _scrub_url(request.url),
+            "req":        _scrub_body(request.body, request.headers.get("content-type", "")),
+            "status":     r.status_code,
+            "ctype":      ctype,
+            "body":       _scrub_body(r.content, ctype),
+            "elapsed_ms": round(r.elapsed.total_seconds() * 1000, 1),
+        })
+        return r
+
+    def close(self):
+        super().close()
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def _write(self, entry: dict):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._file.flush()
+
+
+# ── Replay ────────────────────────────────────────────────────
+
+class Cassette:
+    def __init__(self, path: str | Path):
+        self.path    = Path(path)
+        self.meta    = {}
+        self.entries = []
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break   # baris terakhir terpotong (rekaman dihentikan paksa)
+                if i == 0 and "cassette" in entry:
+                    self.meta = entry
+                else:
+                    self.entries.append(entry)
+
+    @property
+    def config(self) -> dict:
+        return self.meta.get("config", {})
+
+    @property
+    def battles(self) -> int:
+        """Jumlah battle yang dibuat selama rekaman (POST /deploy/battle sukses)."""
+        return sum(1 for e in self.entries
+                   if e["method"] == "POST" and e["url"].endswith("/deploy/battle")
+                   and e["status"] in (200, 201))
+
+
+class CassetteExhausted(requests.ConnectionError):
+    pass
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Jawab request dari cassette tanpa network — antrean FIFO per (method, path)."""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self._queues = defaultdict(deque)
+        for e in cassette.entries:
+            self._queues[_key(e["method"], e["url"])].append(e)
+        self._lock  = threading.Lock()
+        self.served = 0
+        self.missed = 0
+
+    def send(self, request, **kwargs):
+        key = _key(request.method, request.url)
+        with self._lock:
+            q = self._queues.get(key)
+            entry = q.popleft() if q else None
+            if entry:
+                self.served += 1
+            else:
+                self.missed += 1
+        if entry is None:
+            raise CassetteExhausted(f"Cassette habis untuk {key[0]} {key[1]}", request=request)
+
+        r = Response()
+        r.status_code = entry["status"]
+        r.headers     = CaseInsensitiveDict({"content-type": entry.get("ctype", "")})
+        r._content    = entry["body"].encode("utf-8")
+        r.encoding    = "utf-8"
+        r.url         = request.url
+        r.request     = request
+        r.reason      = "REPLAY"
+        r.elapsed     = timedelta(milliseconds=entry.get("elapsed_ms", 0))
+        return r
+
+
+# ── Ringkasan cassette (untuk benchmark) ─────────────────────
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Pakai: python3 cassette.py FILE.jsonl.gz")
+        sys.exit(1)
+    c = Cassette(sys.argv[1])
+    per_ep, size, lat = Counter(), Counter(), defaultdict(list)
+    for e in c.entries:
+        k = f"{e['method']} {urlsplit(e['url']).path}"
+        per_ep[k] += 1
+        size[k]   += len(e["body"])
+        lat[k].append(e["elapsed_ms"])
+    span = c.entries[-1]["t"] - c.entries[0]["t"] if c.entries else 0
+    print(f"\n📼 {c.path.name} — {len(c.entries)} request, {c.battles} battle, {span/60:.1f} menit")
+    print(f"   direkam {c.meta.get('recorded_at', '?')}\n")
+    for k, n in per_ep.most_common():
+        ms = sorted(lat[k])
+        print(f"   {n:>5}×  {k[:60]:<60}  avg {size[k]//n:>6} B  p50 {ms[len(ms)//2]:>7.1f} ms")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+config.py — Config bot dari .env + hot reload
+==============================================
+Config dibaca sekali jadi objek immutable (Config), divalidasi, lalu
+dipantau perubahannya tanpa restart:
+
+  1. ConfigWatcher cek mtime .env setiap beberapa detik (tanpa inotify
+     → tetap jalan di semua OS / mount)
+  2. SIGHUP (`systemctl kill -s HUP molt-battle`) → paksa reload
+  3. Bot memanggil watcher.poll() di batas battle → Config baru
+     hanya dipakai jika valid; jika tidak, config lama dipertahankan
+
+Prioritas nilai: isi .env > environment proses > default.
+"""
+
+import os, logging, threading
+from dataclasses import dataclass, fields
+from pathlib import Path
+from dotenv import dotenv_values
+
+log = logging.getLogger("Config")
+
+POLL_INTERVAL = 3   # detik antar cek mtime .env
+SECRET_FIELDS = {"api_key", "session_cookie"}
+
+
+def _as_bool(v: str) -> bool:
+    return str(v).lower() not in ("0", "false", "no")
+
+
+@dataclass(frozen=True)
+class Config:
+    agent_id:       str  = ""
+    api_key:        str  = ""
+    delay_sec:      int  = 600
+    max_battles:    int  = 0
+    rounds:         int  = 5
+    auto_vote:      bool = True
+    session_cookie: str  = ""
+
+    # (field, env var, parser)
+    ENV = (
+        ("agent_id",       "MOLT_AGENT_ID",       str),
+        ("api_key",        "MOLT_API_KEY",        str),
+        ("delay_sec",      "MOLT_DELAY_SECONDS",  int),
+        ("max_battles",    "MOLT_MAX_BATTLES",    int),
+        ("rounds",         "MOLT_ROUNDS",         int),
+        ("auto_vote",      "MOLT_AUTO_VOTE",      _as_bool),
+        ("session_cookie", "MOLT_SESSION_COOKIE", str),
+    )
+
+    @classmethod
+    def load(cls, env_path: str | Path) -> tuple["Config", list[str]]:
+        """Baca .env (+ environment). Return (config, daftar error)."""
+        env_path = Path(env_path)
+        values = dict(os.environ)
+        if env_path.exists():
+            values.update({k: v for k, v in dotenv_values(env_path).items() if v is not None})
+
+        kwargs, errs = {}, []
+        for name, var, parse in cls.ENV:
+            raw = values.get(var)
+            if raw is None or raw == "":
+                continue
+            try:
+                kwargs[name] = parse(raw.strip())
+            except ValueError:
+                errs.append(f"{var} harus angka (sekarang: {raw!r})")
+        cfg = cls(**kwargs)
+        return cfg, errs + cfg.errors()
+
+    def errors(self) -> list[str]:
+        errs = []
+        if not self.agent_id:
+            errs.append("MOLT_AGENT_ID belum diset")
+        if not self.api_key:
+            errs.append("MOLT_API_KEY belum diset\n"
+                        "  → moltarena.crosstoken.io/settings/api → Generate Key")
+        elif not self.api_key.startswith("pk_live_"):
+            errs.append("MOLT_API_KEY harus dimulai 'pk_live_'")
+        if self.delay_sec < 0:
+            errs.append("MOLT_DELAY_SECONDS tidak boleh negatif")
+        if self.max_battles < 0:
+            errs.append("MOLT_MAX_BATTLES tidak boleh negatif")
+        if self.rounds <= 0:
+            errs.append("MOLT_ROUNDS harus lebih dari 0")
+        return errs
+
+    def diff(self, other: "Config") -> list[str]:
+        """Nama field yang berbeda dengan `other`."""
+        return [f.name for f in fields(self) if getattr(self, f.name) != getattr(other, f.name)]
+
+    def show(self, name: str) -> str:
+        """Nilai field untuk log — secret disamarkan."""
+        v = getattr(self, name)
+        if name in SECRET_FIELDS:
+            return f"{v[:8]}…({len(v)} char)" if v else "(kosong)"
+        return str(v)
+
+
+class ConfigWatcher:
+    def __init__(self, env_path: str | Path, current: Config):
+        self._env_path = Path(env_path)
+        self._current  = current
+        self._mtime    = self._stat()
+        self._dirty    = threading.Event()
+        self._stop     = threading.Event()
+        self._thread   = None
+
+    # ── PUBLIC ────────────────────────────────────────────────
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="ConfigWatcher")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def request_reload(self, *_):
+        """Handler SIGHUP — hanya set flag, reload terjadi di poll()."""
+        self._dirty.set()
+
+    def poll(self) -> Config | None:
+        """Dipanggil di batas battle. Return Config baru jika berubah & valid."""
+        if not self._dirty.is_set():
+            return None
+        self._dirty.clear()
+        new, errs = Config.load(self._env_path)
+        if errs:
+            for e in errs:
+                log.error(f"  ❌ Reload .env ditolak: {e}")
+            log.warning("  ⚠️  Tetap pakai config lama")
+            return None
+        if not self._current.diff(new):
+            return None
+        self._current = new
+        return new
+
+    # ── PRIVATE ───────────────────────────────────────────────
+
+    def _stat(self) -> float:
+        try:
+            return self._env_path.stat().st_mtime
+        except OSError:
+            return 0.0
+
+    def _loop(self):
+        while not self._stop.wait(POLL_INTERVAL):
+            mtime = self._stat()
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._dirty.set()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+doctor.py — Probe latency endpoint & cek kredensial (--doctor)
+===============================================================
+Dipakai lewat `python3 molt_auto_battle.py --doctor` saat battle terasa
+lambat — memisahkan waktu per fase untuk setiap endpoint yang dipakai bot:
+
+  api       GET  /api/agents/{agent_id}                 (server MoltArena)
+  session   GET  /api/auth/session                      (cookie vote)
+  supabase  POST supabase.co/auth/v1/token              (refresh token)
+
+  dns → connect (TCP) → tls (handshake) → ttfb (request → byte pertama) → total
+
+Setiap sampel memakai koneksi baru (tanpa keep-alive) supaya DNS/TCP/TLS
+ikut terukur. Probe Supabase mengirim refresh_token kosong — endpoint
+yang sama, tapi token asli tidak dirotasi.
+
+Cek kredensial tanpa membuat battle:
+  API key   POST /deploy/battle tanpa agent1Id → 401/403 = ditolak,
+            4xx lain = key diterima (payload ditolak sebelum battle dibuat)
+  Cookie    SessionKeeper._check_session (sama seperti saat bot start)
+"""
+
+import ssl, math, time, socket, logging
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from session_keeper import SessionKeeper, AUTH_SESSION, SUPABASE_URL, SUPABASE_ANON_KEY_FALLBACK
+
+log = logging.getLogger("Doctor")
+
+PHASES     = ("dns", "connect", "tls", "ttfb", "total")
+PCTS       = (50, 90, 99)
+SAMPLES    = 5
+INTERVAL   = 0.5    # detik antar sampel
+TIMEOUT    = 10.0
+POLL_NOW   = 15     # interval poll step3_poll saat ini (detik)
+UA         = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+def probe(url: str, method: str = "GET", headers: dict | None = None, body: bytes = b"",
+          timeout: float = TIMEOUT) -> dict:
+    """Satu request lewat socket mentah. Return durasi per fase (ms) + status HTTP."""
+    u      = urlsplit(url)
+    tls    = u.scheme == "https"
+    port   = u.port or (443 if tls else 80)
+    path   = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    out    = {"status": None}
+    sock   = None
+    t0     = time.perf_counter()
+    try:
+        family, kind, proto, _, addr = socket.getaddrinfo(u.hostname, port, type=socket.SOCK_STREAM)[0]
+        t1 = time.perf_counter()
+        out["ip"] = addr[0]
+        sock = socket.socket(family, kind, proto)
+        sock.settimeout(timeout)
+        sock.connect(addr)
+        t2 = time.perf_counter()
+        if tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=u.hostname)
+        t3 = time.perf_counter()
+
+        head = {"Host": u.netloc, "User-Agent": UA, "Accept": "*/*", "Connection": "close",
+                **(headers or {})}
+        if body or method != "GET":
+            head["Content-Length"] = str(len(body))
+        req = f"{method} {path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in head.items())
+        sock.sendall(req.encode("latin-1") + b"\r\n" + body)
+        first = sock.recv(1)
+        t4 = time.perf_counter()
+        data = first
+        while chunk := sock.recv(65536):
+            data += chunk
+        t5 = time.perf_counter()
+
+        status = data.split(b"\r\n", 1)[0].split(b" ")
+        out["status"] = int(status[1]) if len(status) > 1 and status[1].isdigit() else None
+        out.update(dns=t1 - t0, connect=t2 - t1, tls=(t3 - t2) if tls else None,
+                   ttfb=t4 - t3, total=t5 - t0)
+    except (OSError, ValueError) as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if sock:
+            sock.close()
+    for k in PHASES:
+        if out.get(k) is not None:
+            out[k] = round(out[k] * 1000, 1)
+    return out
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    """Persentil dengan interpolasi linear (cocok untuk sampel kecil)."""
+    if not values:
+        return None
+    v = sorted(values)
+    k = (len(v) - 1) * p / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return round(v[lo] + (v[hi] - v[lo]) * (k - lo), 1)
+
+
+def summarize(samples: list[dict]) -> dict:
+    ok  = [s for s in samples if "error" not in s]
+    out = {"samples": len(samples), "errors": len(samples) - len(ok),
+           "status": sorted({s["status"] for s in ok if s["status"] is not None})}
+    for ph in PHASES:
+        vals = [s[ph] for s in ok if s.get(ph) is not None]
+        if vals:
+            out[ph] = {f"p{p}": percentile(vals, p) for p in PCTS} | {"max": max(vals)}
+    errs = [s["error"] for s in samples if "error" in s]
+    if errs:
+        out["last_error"] = errs[-1]
+    return out
+
+
+def recommend(targets: dict) -> dict:
+    """Timeout & interval poll dari persentil (ms) — angka dalam detik."""
+    def p99(name, phase):
+        return ((targets.get(name) or {}).get(phase) or {}).get("p99")
+
+    setup = [sum(p99(n, ph) or 0 for ph in ("dns", "connect", "tls")) for n in targets]
+    ttfb  = [p99(n, "ttfb") for n in targets if p99(n, "ttfb") is not None]
+    api   = ((targets.get("api") or {}).get("total") or {}).get("p90")
+    return {
+        # 3× p99 — sekali lonjakan tidak memicu timeout, server mati tetap cepat ketahuan
+        "connect_timeout": max(3, math.ceil(3 * max(setup, default=0) / 1000)),
+        "read_timeout":    max(5, math.ceil(3 * max(ttfb, default=0) / 1000)),
+        # biaya satu poll ≤ 10% interval; tidak lebih jarang dari sekarang
+        "poll_interval":   min(POLL_NOW, max(5, math.ceil(10 * api / 1000))) if api else POLL_NOW,
+    }
+
+
+class Doctor:
+    def __init__(self, http, api_base: str, agent_id: str, auth_headers: dict, cookie: str = "",
+                 samples: int = SAMPLES, interval: float = INTERVAL, timeout: float = TIMEOUT):
+        self.http         = http
+        self.api_base     = api_base
+        self.agent_id     = agent_id
+        self.auth_headers = auth_headers
+        self.cookie       = cookie
+        self.samples      = max(1, samples)
+        self.interval     = interval
+        self.timeout      = timeout
+
+    def targets(self) -> dict:
+        """name → (method, url, header, body) untuk probe latency."""
+        t = {"api": ("GET", f"{self.api_base}/agents/{self.agent_id}", {}, b"")}
+        if self.cookie:
+            t["session"] = ("GET", AUTH_SESSION, {"Accept": "application/json", "cookie": self.cookie}, b"")
+        t["supabase"] = ("POST", f"{SUPABASE_URL}/auth/v1/token?grant_type=refresh_token",
+                         {"Content-Type": "application/json", "apikey": SUPABASE_ANON_KEY_FALLBACK},
+                         b'{"refresh_token":""}')
+        return t
+
+    def run(self) -> dict:
+        targets = self.targets()
+        raw     = {name: [] for name in targets}
+        for i in range(self.samples):
+            if i:
+                time.sleep(self.interval)
+            for name, (method, url, headers, body) in targets.items():
+                raw[name].append(probe(url, method, headers, body, self.timeout))
+        stats = {name: {"url": targets[name][1].split("?")[0], **summarize(s)} for name, s in raw.items()}
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "host":         socket.gethostname(),
+            "agent_id":     self.agent_id,
+            "checks":       {"api_key": self.check_api_key(), "cookie": self.check_cookie()},
+            "targets":      stats,
+            "recommend":    recommend(stats),
+        }
+
+    def check_api_key(self) -> dict:
+        try:
+            r = self.http.post(f"{self.api_base}/deploy/battle", headers=self.auth_headers,
+                               json={}, timeout=self.timeout)
+        except Exception as e:
+            return {"ok": None, "detail": str(e)}
+        if r.status_code in (401, 403):
+            return {"ok": False, "status": r.status_code, "detail": r.text[:120]}
+        # 4xx lain = auth lolos, payload ditolak; 404 / 5xx = tidak bisa dipastikan
+        ok = None if r.status_code == 404 or r.status_code >= 500 else True
+        return {"ok": ok, "status": r.status_code}
+
+    def check_cookie(self) -> dict:
+        if not self.cookie:
+            return {"ok": None, "detail": "MOLT_SESSION_COOKIE kosong"}
+        keeper = SessionKeeper(self.cookie, session=self.http)
+        valid, expiry = keeper._check_session()
+        return {"ok": valid, "expires": expiry or None, "refresh_token": bool(keeper.jar.refresh_token),
+                "token_expires_at": keeper.jar.expires_at, "chunks": keeper.jar.chunks}
+
+
+def _mark(ok) -> str:
+    return "✅" if ok else "⚪" if ok is None else "❌"
+
+
+def print_report(rep: dict):
+    print(f"\n🩺 MoltArena doctor — {rep['host']} · {rep['generated_at']}\n")
+    k, c = rep["checks"]["api_key"], rep["checks"]["cookie"]
+    print(f"   {_mark(k['ok'])} API key   : {k.get('status', '')} {k.get('detail', '')}".rstrip())
+    exp = (c.get("expires") or "")[:19].replace("T", " ")
+    print(f"   {_mark(c['ok'])} Cookie    : " + (c.get("detail") or
+          f"{'valid' if c['ok'] else 'tidak valid'}{f' s/d {exp}' if exp else ''}, "
+          f"refresh token {'ada' if c.get('refresh_token') else 'tidak ada'}"))
+    print(f"\n   {'endpoint':<10}{'fase':<9}" + "".join(f"{f'p{p}':>9}" for p in PCTS) + f"{'max':>9}   (ms)")
+    for name, t in rep["targets"].items():
+        print(f"   {name:<10}{'':<9}{t['samples'] - t['errors']}/{t['samples']} ok, HTTP {t['status'] or '-'}"
+              + (f" — {t['last_error']}" if t.get("last_error") else ""))
+        for ph in PHASES:
+            if ph in t:
+                print(f"   {'':<10}{ph:<9}" + "".join(f"{t[ph][f'p{p}']:>9}" for p in PCTS) + f"{t[ph]['max']:>9}")
+    r = rep["recommend"]
+    print(f"\n   💡 Timeout connect {r['connect_timeout']}s / read {r['read_timeout']}s (sekarang 30s) · "
+          f"poll tiap {r['poll_interval']}s (sekarang {POLL_NOW}s)\n")
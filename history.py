@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+history.py — Riwayat battle (SQLite) untuk MoltArena Bot
+=========================================================
+Satu baris per battle, kunci = battleNumber (unik global di MoltArena),
+jadi data dari bot live, import log lama, dan backfill API bisa digabung
+tanpa duplikat: upsert hanya mengisi kolom yang masih kosong / berubah
+(COALESCE), tidak pernah menghapus nilai yang sudah ada.
+
+Kolom waktu fase (detik): t_create, t_run, t_poll, t_voting, t_final.
+Kolom `rev` naik setiap baris ditulis → pembaca (analytics) cukup ambil
+baris dengan rev > rev terakhir yang sudah dilihat.
+"""
+
+import sqlite3, logging, threading
+from pathlib import Path
+
+log = logging.getLogger("History")
+
+COLUMNS = (
+    "battle_num", "battle_id", "agent_id", "opponent_id", "opponent", "topic",
+    "rounds", "outcome", "vote_my", "vote_op", "created_at", "finished_at",
+    "run_attempts", "t_create", "t_run", "t_poll", "t_voting", "t_final", "source",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS battles (
+    battle_num   INTEGER PRIMARY KEY,
+    battle_id    TEXT,
+    agent_id     TEXT,
+    opponent_id  TEXT,
+    opponent     TEXT,
+    topic        TEXT,
+    rounds       INTEGER,
+    outcome      TEXT,      -- win / lose / draw / skip
+    vote_my      INTEGER,
+    vote_op      INTEGER,
+    created_at   REAL,      -- unix timestamp
+    finished_at  REAL,
+    run_attempts INTEGER,
+    t_create     REAL,
+    t_run        REAL,
+    t_poll       REAL,
+    t_voting     REAL,
+    t_final      REAL,
+    source       TEXT,      -- live / log / api
+    rev          INTEGER    -- nomor perubahan, diisi otomatis oleh upsert
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_battles_id ON battles(battle_id);
+CREATE INDEX IF NOT EXISTS idx_battles_rev ON battles(rev);
+"""
+
+_INSERT = (
+    f"INSERT INTO battles ({', '.join(COLUMNS)}, rev) VALUES ({', '.join('?' * len(COLUMNS))}, "
+    "(SELECT IFNULL(MAX(rev), 0) + 1 FROM battles)) "
+    "ON CONFLICT(battle_num) DO UPDATE SET "
+)
+_UPSERT = (
+    _INSERT
+    + ", ".join(f"{c} = COALESCE(excluded.{c}, battles.{c})" for c in COLUMNS[1:])
+    + ", rev = excluded.rev"
+)
+# Mode isi-saja (import / backfill): nilai yang sudah ada tidak pernah ditimpa,
+# dan baris yang tidak bertambah isinya tidak disentuh (rev tetap) → idempotent.
+_FILL = (
+    _INSERT
+    + ", ".join(f"{c} = COALESCE(battles.{c}, excluded.{c})" for c in COLUMNS[1:])
+    + ", rev = excluded.rev WHERE "
+    + " OR ".join(f"(battles.{c} IS NULL AND excluded.{c} IS NOT NULL)" for c in COLUMNS[1:])
+)
+
+
+class History:
+    def __init__(self, path: str | Path):
+        self.path  = Path(path)
+        self._lock = threading.Lock()
+        self._db   = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        cols = {r[1] for r in self._db.execute("PRAGMA table_info(battles)")}
+        if "rev" not in cols:   # DB dari versi sebelum kolom rev
+            self._db.execute("ALTER TABLE battles ADD COLUMN rev INTEGER")
+        self._db.executescript(INDEXES)
+
+    def upsert(self, rec: dict) -> bool:
+        return self.upsert_many([rec]) == 1
+
+    def upsert_many(self, recs, batch: int = 1000, fill_only: bool = False) -> int:
+        """Upsert dalam transaksi per `batch` baris. Record tanpa battle_num dilewati.
+
+        fill_only=True → hanya isi kolom yang masih kosong (untuk import data lama).
+        """
+        sql, n, rows = _FILL if fill_only else _UPSERT, 0, []
+        for rec in recs:
+            num = _as_int(rec.get("battle_num"))
+            if num is None:
+                continue
+            rows.append((num,) + tuple(rec.get(c) for c in COLUMNS[1:]))
+            if len(rows) >= batch:
+                n += self._flush(sql, rows)
+                rows = []
+        if rows:
+            n += self._flush(sql, rows)
+        return n
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM battles").fetchone()[0]
+
+    def revision(self) -> tuple[int, int]:
+        """(jumlah baris, rev tertinggi) — murah, lewat index."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*), IFNULL(MAX(rev), 0) FROM battles").fetchone()
+
+    def rows(self, columns=COLUMNS, where: str = "", params: tuple = ()) -> list[tuple]:
+        """SELECT mentah (urut battle_num) — dipakai analytics untuk load sekali jalan."""
+        cols = ", ".join(c for c in columns if c in COLUMNS or c == "rev")
+        with self._lock:
+            return self._db.execute(f"SELECT {cols} FROM battles {where} ORDER BY battle_num",
+                                    params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _flush(self, sql: str, rows: list) -> int:
+        with self._lock, self._db:
+            self._db.executemany(sql, rows)
+        return len(rows)
+
+
+def outcome_of(battle: dict, my_id: str) -> str:
+    """win / lose / draw dari winnerId (tanpa pemenang = draw)."""
+    winner = battle.get("winnerId")
+    if winner is None:
+        return "draw"
+    return "win" if winner == my_id else "lose"
+
+
+def _as_int(v) -> int | None:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
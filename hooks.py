@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+hooks.py — Pipeline hook pasca-battle (asinkron) untuk MoltArena Bot
+=====================================================================
+Loop battle hanya memanggil `emit()` — event masuk antrean terbatas dan
+dikirim ke setiap hook oleh worker pool di belakang, jadi receiver yang
+lambat / mati tidak pernah menunda countdown berikutnya.
+
+  Event    : on_created · on_voting · on_result · on_error
+  Hook     : objek dengan method bernama event (turunan Hook, atau duck-typed)
+  Antrean  : MOLT_HOOK_QUEUE job; penuh → event dibuang & dihitung (dropped)
+  Retry    : exception di hook → diulang RETRIES kali dengan backoff
+  Telat    : dikirim lebih dari MOLT_HOOK_LATE detik setelah emit → dihitung (late)
+
+Urutan pengiriman per hook tidak dijamin jika worker > 1 — pakai
+battle_num / ts di event untuk mengurutkan di sisi penerima.
+
+Sink bawaan: WebhookHook (MOLT_HOOK_URL), FileDropHook (MOLT_HOOK_DIR),
+HistoryHook (molt_history.db). Hook sendiri: MOLT_HOOKS=modul:Kelas,…
+"""
+
+import os, json, time, queue, logging, threading, importlib
+from pathlib import Path
+
+import requests
+
+log = logging.getLogger("Hooks")
+
+EVENTS     = ("on_created", "on_voting", "on_result", "on_error")
+WORKERS    = int(os.getenv("MOLT_HOOK_WORKERS", "2"))
+QUEUE_SIZE = int(os.getenv("MOLT_HOOK_QUEUE",   "256"))
+LATE_AFTER = float(os.getenv("MOLT_HOOK_LATE",  "60"))
+RETRIES    = 3
+BACKOFF    = 2.0   # detik, dikali 2 tiap percobaan
+
+
+class Hook:
+    """Basis hook — override event yang dibutuhkan. Exception → job diulang."""
+
+    def on_created(self, event: dict): pass
+    def on_voting(self, event: dict):  pass
+    def on_result(self, event: dict):  pass
+    def on_error(self, event: dict):   pass
+
+    def __repr__(self):
+        return type(self).__name__
+
+
+def _handles(hook, name: str) -> bool:
+    fn = getattr(type(hook), name, None) or getattr(hook, name, None)
+    return callable(fn) and fn is not getattr(Hook, name)
+
+
+class HookPipeline:
+    def __init__(self, hooks=(), workers: int = WORKERS, queue_size: int = QUEUE_SIZE,
+                 late_after: float = LATE_AFTER, retries: int = RETRIES):
+        self.hooks      = list(hooks)
+        self.workers    = max(1, workers)
+        self.late_after = late_after
+        self.retries    = retries
+        self._q         = queue.Queue(maxsize=max(1, queue_size))
+        self._stop      = threading.Event()
+        self._threads   = []
+        self._lock      = threading.Lock()
+        self._stats     = dict.fromkeys(("emitted", "queued", "delivered", "retried",
+                                         "failed", "dropped", "late", "max_depth"), 0)
+
+    # ── PUBLIC ────────────────────────────────────────────────
+
+    def register(self, hook):
+        self.hooks.append(hook)
+
+    def start(self):
+        if self._threads or not self.hooks:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, daemon=True, name=f"Hook-{i}")
+            t.start()
+            self._threads.append(t)
+        log.info(f"  🪝 Hooks: {', '.join(map(repr, self.hooks))} ({self.workers} worker)")
+
+    def emit(self, name: str, **data) -> int:
+        """Antrekan event untuk setiap hook yang menanganinya. Tidak pernah blok."""
+        if name not in EVENTS:
+            raise ValueError(f"event tidak dikenal: {name}")
+        targets = [h for h in self.hooks if _handles(h, name)]
+        if not targets or not self._threads or self._stop.is_set():
+            return 0
+        event  = {"event": name, "ts": time.time(), **data}
+        queued = 0
+        for hook in targets:
+            try:
+                self._q.put_nowait((hook, name, event))
+                queued += 1
+            except queue.Full:
+                self._count("dropped")
+                if self._stats["dropped"] % 50 == 1:
+                    log.warning(f"  ⚠️  Antrean hook penuh ({self._q.maxsize}) — "
+                                f"{self._stats['dropped']} event dibuang")
+        with self._lock:
+            self._stats["emitted"]   += 1
+            self._stats["queued"]    += queued
+            self._stats["max_depth"]  = max(self._stats["max_depth"], self._q.qsize())
+        return queued
+
+    def stop(self, timeout: float = 10.0):
+        """Kirim sisa antrean maksimal `timeout` detik; sisanya dihitung dropped."""
+        if not self._threads:
+            return
+        deadline = time.monotonic() + timeout
+        while self._q.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=max(0.0, deadline - time.monotonic()) + 1)
+        left = self._q.qsize()
+        if left:
+            self._count("dropped", left)
+            log.warning(f"  ⚠️  {left} event hook belum terkirim saat shutdown → dibuang")
+        self._threads = []
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "depth": self._q.qsize()}
+
+    # ── PRIVATE ───────────────────────────────────────────────
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                hook, name, event = self._q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                if time.time() - event["ts"] > self.late_after:
+                    self._count("late")
+                self._deliver(hook, name, event)
+            finally:
+                self._q.task_done()
+
+    def _deliver(self, hook, name: str, event: dict):
+        for attempt in range(self.retries + 1):
+            try:
+                getattr(hook, name)(event)
+                self._count("delivered")
+                return
+            except Exception as e:
+                if attempt == self.retries or self._stop.is_set():
+                    self._count("failed")
+                    log.warning(f"  ⚠️  Hook {hook!r}.{name} gagal: {e}")
+                    return
+                self._count("retried")
+                log.debug(f"  Hook {hook!r}.{name} attempt {attempt + 1}: {e}")
+                if self._stop.wait(BACKOFF * 2 ** attempt):
+                    self._count("failed")
+                    return
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+
+# ── Sink bawaan ──────────────────────────────────────────────────
+
+def _dumps(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class WebhookHook(Hook):
+    """POST JSON setiap event ke receiver HTTP. Status ≥ 400 → diulang."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url     = url
+        self.timeout = timeout
+        self._http   = requests.Session()
+
+    def _post(self, event: dict):
+        r = self._http.post(self.url, data=_dumps(event).encode("utf-8"), timeout=self.timeout,
+                            headers={"Content-Type": "application/json",
+                                     "X-Molt-Event": event["event"]})
+        r.raise_for_status()
+
+    on_created = on_voting = on_result = on_error = _post
+
+    def __repr__(self):
+        return f"webhook({self.url})"
+
+
+class FileDropHook(Hook):
+    """Satu file JSON per event di folder drop (ditulis atomik → aman dibaca watcher lain)."""
+
+    def __init__(self, directory: str | Path):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def _write(self, event: dict):
+        name = f"{int(event['ts'] * 1000)}_{event['event']}_{event.get('battle_num', '-')}.json"
+        tmp  = self.dir / f".{name}.{threading.get_ident()}.tmp"
+        tmp.write_text(_dumps(event), encoding="utf-8")
+        os.replace(tmp, self.dir / name)
+
+    on_created = on_voting = on_result = on_error = _write
+
+    def __repr__(self):
+        return f"file({self.dir})"
+
+
+class HistoryHook(Hook):
+    """Tulis record hasil battle (event["record"]) ke History."""
+
+    def __init__(self, history):
+        self.history = history
+
+    def on_result(self, event: dict):
+        if event.get("record"):
+            self.history.upsert(event["record"])
+
+    def __repr__(self):
+        return "history"
+
+
+def load_hooks(spec: str) -> list:
+    """'modul:Kelas,modul2:Kelas2' → instance hook (konstruktor tanpa argumen)."""
+    out = []
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        module, _, attr = item.partition(":")
+        out.append(getattr(importlib.import_module(module), attr)())
+    return out
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+lease.py — Lease / leader election antar host untuk MoltArena Bot
+==================================================================
+Satu MOLT_AGENT_ID hanya boleh dijalankan satu bot. Host aktif & standby
+berbagi satu lease:
+
+  - Leader memperbarui lease (heartbeat) setiap TTL/3 detik
+  - Standby mencoba ambil lease setiap detik → lease kedaluwarsa
+    (leader mati / hang / jaringan putus) → diambil alih ≤ TTL detik
+  - Setiap ganti pemegang, fencing token naik. Bot memeriksa token-nya
+    masih berlaku tepat sebelum membuat battle, jadi leader lama yang
+    "hidup lagi" tidak bisa membuat battle ganda
+  - Shutdown normal melepas lease → standby langsung ambil alih
+
+Backend bawaan: file SQLite di shared mount (MOLT_LEASE_FILE). Jam antar
+host harus sinkron (NTP) dengan selisih jauh di bawah TTL. Backend lain
+(Redis, etcd, …) cukup mengimplementasikan LeaseBackend dan dipasang
+lewat MOLT_LEASE_BACKEND=modul:Kelas.
+"""
+
+import os, time, socket, logging, sqlite3, threading, importlib
+from pathlib import Path
+
+log = logging.getLogger("Lease")
+
+TTL          = 10.0   # detik lease berlaku tanpa heartbeat
+STANDBY_POLL = 1.0    # detik antar percobaan ambil lease oleh standby
+SAFETY       = 0.8    # leader menganggap dirinya leader hanya sampai 80% TTL tanpa renew
+
+
+class LeaseBackend:
+    """Antarmuka backend lease. Semua method harus atomik terhadap host lain."""
+
+    def acquire(self, name: str, holder: str, ttl: float) -> int | None:
+        """Ambil / perpanjang lease. Return fencing token, None jika dipegang host lain."""
+        raise NotImplementedError
+
+    def release(self, name: str, holder: str):
+        raise NotImplementedError
+
+    def validate(self, name: str, holder: str, token: int) -> bool:
+        """True jika `holder` masih memegang lease dengan `token` ini dan belum kedaluwarsa."""
+        raise NotImplementedError
+
+    def current(self, name: str) -> dict | None:
+        """Info pemegang saat ini (holder, token, expires) — untuk log."""
+        raise NotImplementedError
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS leases (
+        name    TEXT PRIMARY KEY,
+        holder  TEXT,
+        token   INTEGER NOT NULL,
+        expires REAL    NOT NULL   -- unix timestamp
+    );
+    """
+
+    def __init__(self, path: str | Path):
+        self.path  = Path(path)
+        self._lock = threading.Lock()
+        # isolation_level=None → transaksi diatur manual (BEGIN IMMEDIATE)
+        self._db   = sqlite3.connect(self.path, check_same_thread=False, timeout=5,
+                                     isolation_level=None)
+        # journal DELETE (bukan WAL): WAL butuh shared memory → tidak aman di network mount
+        self._db.execute("PRAGMA journal_mode=DELETE")
+        self._db.executescript(self.SCHEMA)
+
+    def acquire(self, name: str, holder: str, ttl: float) -> int | None:
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = db.execute("SELECT holder, token, expires FROM leases WHERE name = ?",
+                                 (name,)).fetchone()
+                if row and row[0] != holder and row[2] > now:
+                    db.execute("ROLLBACK")
+                    return None
+                token = (row[1] if row else 0) + (0 if row and row[0] == holder else 1)
+                db.execute("INSERT INTO leases (name, holder, token, expires) VALUES (?, ?, ?, ?) "
+                           "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, "
+                           "token = excluded.token, expires = excluded.expires",
+                           (name, holder, token, now + ttl))
+                db.execute("COMMIT")
+                return token
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def release(self, name: str, holder: str):
+        with self._lock:
+            self._db.execute("UPDATE leases SET expires = 0 WHERE name = ? AND holder = ?",
+                             (name, holder))
+
+    def validate(self, name: str, holder: str, token: int) -> bool:
+        info = self.current(name)
+        return bool(info and info["holder"] == holder and info["token"] == token
+                    and info["expires"] > time.time())
+
+    def current(self, name: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT holder, token, expires FROM leases WHERE name = ?",
+                                   (name,)).fetchone()
+        return dict(zip(("holder", "token", "expires"), row)) if row else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def load_backend(spec: str) -> LeaseBackend:
+    """'modul:Kelas' → instance backend (konstruktor tanpa argumen)."""
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)()
+
+
+class Lease:
+    def __init__(self, backend: LeaseBackend, name: str, holder: str | None = None,
+                 ttl: float = TTL):
+        self.backend  = backend
+        self.name     = name
+        self.holder   = holder or f"{socket.gethostname()}:{os.getpid()}"
+        self.ttl      = ttl
+        self.token    = None
+        self._renewed = 0.0          # time.monotonic() renew sukses terakhir
+        self._lock    = threading.Lock()
+        self._stop    = threading.Event()
+        self._thread  = None
+
+    # ── PUBLIC ────────────────────────────────────────────────
+
+    @property
+    def is_leader(self) -> bool:
+        """Dihitung dengan jam lokal — tidak perlu akses backend."""
+        with self._lock:
+            return (self.token is not None
+                    and time.monotonic() - self._renewed < self.ttl * SAFETY)
+
+    def wait_leader(self, stop: threading.Event) -> bool:
+        """Blok sampai jadi leader. False jika `stop` di-set lebih dulu."""
+        announced = False
+        while not stop.is_set():
+            if self._try_acquire():
+                self._start_heartbeat()
+                return True
+            if not announced:
+                cur = self.backend.current(self.name) or {}
+                log.info(f"  ⏸️  Standby — lease {self.name} dipegang {cur.get('holder', '?')}, "
+                         f"menunggu (ambil alih ≤ {self.ttl:.0f}s setelah leader berhenti)...")
+                announced = True
+            stop.wait(STANDBY_POLL)
+        return False
+
+    def fence(self) -> bool:
+        """Cek ke backend bahwa token kita masih berlaku — panggil sebelum aksi yang tidak boleh ganda."""
+        if not self.is_leader:
+            return False
+        try:
+            return self.backend.validate(self.name, self.holder, self.token)
+        except Exception as e:
+            log.warning(f"  ⚠️  Cek lease gagal: {e}")
+            return False
+
+    def release(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.ttl)
+        with self._lock:
+            had, self.token = self.token, None
+        if had is not None:
+            try:
+                self.backend.release(self.name, self.holder)
+                log.info(f"  🔓 Lease {self.name} dilepas")
+            except Exception as e:
+                log.warning(f"  ⚠️  Gagal lepas lease: {e}")
+
+    # ── PRIVATE ───────────────────────────────────────────────
+
+    def _try_acquire(self) -> bool:
+        try:
+            token = self.backend.acquire(self.name, self.holder, self.ttl)
+        except Exception as e:
+            log.warning(f"  ⚠️  Backend lease error: {e}")
+            token = None
+        with self._lock:
+            prev, self.token = self.token, token
+            if token is not None:
+                self._renewed = time.monotonic()
+        if token is not None and token != prev:
+            log.info(f"  👑 Leader untuk {self.name} (fencing token {token})")
+        elif token is None and prev is not None:
+            log.warning(f"  ⚠️  Lease {self.name} hilang — berhenti membuat battle")
+        return token is not None
+
+    def _start_heartbeat(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True, name="LeaseHeartbeat")
+        self._thread.start()
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.ttl / 3):
+            if not self._try_acquire():
+                return   # kalah → main loop kembali ke wait_leader()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+log_import.py — Isi history dari molt_battle.log lama
+=====================================================
+Baca log bot (termasuk hasil rotasi .1 / .2.gz / .2024-05-01) dalam satu
+pass streaming — memori konstan berapa pun ukuran log — lalu susun ulang
+satu record per battle dari baris yang sudah ditulis bot:
+
+  ✅ Battle #N dibuat! · 📌 Topic · 🆚 Lawan · Step 2–5 (timing fase)
+  /run HTTP 500 (attempt k/3) · kotak HASIL BATTLE (outcome + votes)
+
+Record di-upsert ke molt_history.db (source "log") dengan mode isi-saja:
+nilai yang sudah ada (mis. dari bot live) tidak ditimpa, dan import ulang
+log yang sama tidak mengubah apa pun.
+
+  python3 log_import.py                          # molt_battle.log* di folder bot
+  python3 log_import.py /var/log/molt/*.gz --db history.db
+"""
+
+import re, sys, gzip, time, argparse
+from collections import Counter
+from pathlib import Path
+
+from history import History
+from analytics import DEFAULT_DB
+
+LOG_PATH = Path(__file__).parent / "molt_battle.log"
+
+# Karakter pertama pesan yang relevan — baris lain (poll tick, DEBUG HTTP) dilewati murah
+_MARKERS = set("📤🚀♻🤖🎯🔧✅📌🆚▶/🔄🗳⚠🏁🔍║╚💾")
+_NUM     = re.compile(r"#(\d+)")
+_ATTEMPT = re.compile(r"attempt (\d)/3")
+_VOTES   = re.compile(r"=(\d+)\s*\|.*=(\d+)")
+_CONFIG  = re.compile(r"Config (\w+): .* → (.*)$")
+_LABELS  = {"MENANG": "win", "KALAH": "lose", "DRAW": "draw"}
+
+
+def log_files(base: str | Path = LOG_PATH) -> list[Path]:
+    """File log urut dari yang paling lama: .N.gz … .1, bertanggal, lalu file aktif."""
+    base = Path(base)
+
+    def key(p: Path):
+        suffix = p.name[len(base.name):].lstrip(".").removesuffix(".gz")
+        if not suffix:
+            return (2, 0)
+        if suffix.isdigit():
+            return (1, -int(suffix))
+        return (0, suffix)
+
+    return sorted(base.parent.glob(base.name + "*"), key=key)
+
+
+def _open(path: Path):
+    with open(path, "rb") as f:
+        gz = f.read(2) == b"\x1f\x8b"
+    if gz:
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def lines(paths):
+    for p in paths:
+        with _open(Path(p)) as f:
+            yield from f
+
+
+class _Parser:
+    """State machine per baris — hanya battle yang sedang dibaca disimpan di memori."""
+
+    def __init__(self):
+        self.agent_id = None
+        self.rounds   = None
+        self.cur      = None
+        self.marks    = {}
+        self._ts_raw  = None
+        self._ts      = None
+
+    def feed(self, line: str):
+        """Proses satu baris; yield record battle yang selesai (0 atau lebih)."""
+        # "YYYY-mm-dd HH:MM:SS [LEVEL] pesan"
+        if len(line) < 24 or line[19:21] != " [":
+            return
+        end = line.find("] ", 21)
+        if end < 0:
+            return
+        msg = line[end + 2:].strip()
+        if not msg or msg[0] not in _MARKERS:
+            return
+        try:
+            ts = self._time(line[:19])
+        except ValueError:
+            return
+        cur, marks = self.cur, self.marks
+
+        if msg.startswith("📤 Step 1") or msg.startswith("🚀 Auto battle dimulai"):
+            yield from self._emit()
+            if msg.startswith("📤"):
+                self._start({})
+                self.marks["create"] = ts
+        elif msg.startswith("♻️") and "Lanjutkan battle #" in msg:
+            yield from self._emit()
+            n = _NUM.search(msg)
+            self._start({"battle_num": int(n.group(1))} if n else {})
+        elif msg.startswith("🤖 Agent"):
+            self.agent_id = msg.split(":", 1)[1].strip() or None
+        elif msg.startswith("🎯 Rounds"):
+            self.rounds = _int(msg.split(":", 1)[1])
+        elif msg.startswith("🔧 Config"):
+            c = _CONFIG.search(msg)
+            if c and c.group(1) == "rounds":
+                self.rounds = _int(c.group(2))
+            elif c and c.group(1) == "agent_id":
+                self.agent_id = c.group(2).strip()
+        elif cur is None:
+            return
+        elif msg.startswith("✅ Battle #") and msg.endswith("dibuat!"):
+            n = _NUM.search(msg)
+            cur["battle_num"] = int(n.group(1)) if n else None
+            cur["created_at"] = ts
+            cur["t_create"]   = _since(marks, "create", ts)
+        elif msg.startswith("📌 Topic:"):
+            cur["topic"] = msg.split(":", 1)[1].strip()
+        elif msg.startswith("🆚 Lawan:"):
+            cur["opponent"] = msg.split(":", 1)[1].strip()
+        elif msg.startswith("▶️"):
+            marks["run"] = ts
+            cur["run_attempts"] = 1
+        elif msg.startswith("/run HTTP 500") or msg.startswith("/run error attempt"):
+            a = _ATTEMPT.search(msg)
+            if a:
+                cur["run_attempts"] = min(3, int(a.group(1)) + 1)
+        elif msg.startswith("🔄 Step 3"):
+            cur["t_run"] = _since(marks, "run", ts)
+            marks["poll"] = ts
+        elif msg.startswith("🗳️  Step 4") or "Battle selesai → auto-vote" in msg:
+            cur["t_poll"] = _since(marks, "poll", ts)
+        elif msg.startswith("⚠️  Polling timeout"):
+            cur["t_poll"]  = _since(marks, "poll", ts)
+            cur["outcome"] = "skip"
+            cur["finished_at"] = ts
+            yield from self._emit()
+        elif msg.startswith("🏁 Step 5"):
+            marks["voting"] = ts
+        elif msg.startswith("🔍 Voting selesai"):
+            cur["t_voting"] = _since(marks, "voting", ts)
+            marks["final"] = ts
+        elif ("Hasil final diterima" in msg or "Battle completed" in msg
+              or "Timeout poll hasil" in msg):
+            cur["t_final"] = _since(marks, "final", ts)
+        elif "HASIL BATTLE #" in msg:
+            n = _NUM.search(msg)
+            if n and cur.get("battle_num") is None:
+                cur["battle_num"] = int(n.group(1))
+            label = msg.rsplit("→", 1)[-1].replace("║", "").strip()
+            cur["outcome"]     = _LABELS.get(label)
+            cur["finished_at"] = ts
+        elif msg.startswith("║  🗳️  Votes") and cur.get("outcome"):
+            v = _VOTES.search(msg)
+            if v:
+                cur["vote_my"], cur["vote_op"] = int(v.group(1)), int(v.group(2))
+        elif msg.startswith("╚") and cur.get("outcome"):
+            yield from self._emit()
+        elif msg.startswith("💾 Battle #"):
+            yield from self._emit()   # dihentikan; sisa battle diisi saat dilanjutkan
+
+    def close(self):
+        yield from self._emit()
+
+    def _start(self, rec: dict):
+        self.cur = {"agent_id": self.agent_id, "rounds": self.rounds, **rec}
+        self.marks = {}
+
+    def _emit(self):
+        cur, self.cur = self.cur, None
+        if cur and cur.get("battle_num") is not None:
+            cur["source"] = "log"
+            yield cur
+
+    def _time(self, raw: str) -> float:
+        if raw != self._ts_raw:   # banyak baris berurutan dengan detik yang sama
+            self._ts_raw = raw
+            self._ts     = time.mktime((int(raw[0:4]), int(raw[5:7]), int(raw[8:10]),
+                                        int(raw[11:13]), int(raw[14:16]), int(raw[17:19]), 0, 0, -1))
+        return self._ts
+
+
+def _since(marks: dict, name: str, ts: float) -> float | None:
+    return ts - marks[name] if name in marks else None
+
+
+def _int(v) -> int | None:
+    try:
+        return int(str(v).strip())
+    except ValueError:
+        return None
+
+
+def parse(line_iter):
+    """Iterasi baris log → record battle (dict kolom history)."""
+    p = _Parser()
+    for line in line_iter:
+        yield from p.feed(line)
+    yield from p.close()
+
+
+def import_logs(paths, db_path: str | Path = DEFAULT_DB, batch: int = 1000) -> Counter:
+    """Import log ke history. Return Counter outcome battle yang terbaca."""
+    seen = Counter()
+
+    def counted(recs):
+        for r in recs:
+            seen[r.get("outcome") or "partial"] += 1
+            yield r
+
+    h = History(db_path)
+    try:
+        h.upsert_many(counted(parse(lines(paths))), batch=batch, fill_only=True)
+    finally:
+        h.close()
+    return seen
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Import molt_battle.log lama ke history")
+    p.add_argument("files", nargs="*", help="File log (default: molt_battle.log* di folder bot)")
+    p.add_argument("--db",  default=DEFAULT_DB, help="Path molt_history.db")
+    args = p.parse_args()
+
+    files = [Path(f) for f in args.files] or log_files()
+    if not files:
+        print(f"❌ Tidak ada log di {LOG_PATH.parent}")
+        sys.exit(1)
+    t0 = time.monotonic()
+    h = History(args.db)
+    before = h.revision()
+    h.close()
+    seen = import_logs(files, args.db)
+    h = History(args.db)
+    after = h.revision()
+    h.close()
+    size = sum(f.stat().st_size for f in files)
+    print(f"\n📥 {len(files)} file ({size / 1e6:.1f} MB) dalam {time.monotonic() - t0:.1f}s")
+    print(f"   {sum(seen.values())} battle terbaca: " + ", ".join(f"{k} {v}" for k, v in seen.most_common()))
+    print(f"   History: {before[0]} → {after[0]} baris, {after[1] - before[1]} baris berubah\n")
@@ -9,11 +9,24 @@ MoltArena Auto Battle Bot — v10
 - Summary otomatis saat Ctrl+C
 """
 
-import os, sys, time, json, logging, argparse, signal, importlib.util
+import os, sys, time, json, logging, argparse, signal, tempfile, threading
 import requests
 from datetime import datetime
+from http.cookiejar import DefaultCookiePolicy
 from pathlib import Path
 from dotenv import load_dotenv
+from tracing import Tracer
+from profiler import Profiler
+from config import Config, ConfigWatcher
+from cassette import Cassette, RecordingAdapter, ReplayAdapter
+from history import History, outcome_of
+from archive import Archive
+from agent_cache import AgentCache, UNKNOWN
+from backfill import Backfill, WORKERS as BACKFILL_WORKERS
+from lease import Lease, SQLiteLeaseBackend, load_backend
+from session_keeper import SessionKeeper, SessionJar
+from doctor import Doctor, print_report, SAMPLES as DOCTOR_SAMPLES
+from hooks import HookPipeline, HistoryHook, WebhookHook, FileDropHook, load_hooks
 
 ENV_PATH = Path(__file__).parent / ".env"
 load_dotenv(ENV_PATH)
@@ -22,15 +35,47 @@ BASE_URL = "https://moltarena.crosstoken.io"
 API_BASE = f"{BASE_URL}/api"
 
 # ─── Semua config dari .env ────────────────────────────────────
-AGENT_ID       = os.getenv("MOLT_AGENT_ID",       "")
-API_KEY        = os.getenv("MOLT_API_KEY",         "")
-DELAY_SEC      = int(os.getenv("MOLT_DELAY_SECONDS", "600"))
-MAX_BATTLES    = int(os.getenv("MOLT_MAX_BATTLES",   "0"))
-ROUNDS         = int(os.getenv("MOLT_ROUNDS",        "5"))
-AUTO_VOTE      = os.getenv("MOLT_AUTO_VOTE",         "true").lower() not in ("0","false","no")
-SESSION_COOKIE = os.getenv("MOLT_SESSION_COOKIE",    "")
+# Config battle bisa di-reload tanpa restart (lihat config.py) —
+# selalu baca lewat CFG, jangan disalin ke variabel lain.
+CFG, _CFG_ERRS = Config.load(ENV_PATH)
+_watcher: ConfigWatcher | None = None
+
+# Config proses (berlaku sampai restart)
+TRACE_ENABLED  = os.getenv("MOLT_TRACE",             "true").lower() not in ("0","false","no")
+TRACE_FILE     = os.getenv("MOLT_TRACE_FILE",        str(Path(__file__).parent / "molt_traces.jsonl"))
+PROFILE_EVERY  = int(os.getenv("MOLT_PROFILE_EVERY", "10"))
+PROFILE_DIR    = Path(__file__).parent / "profiles"
+HISTORY_DB     = os.getenv("MOLT_HISTORY_DB",        str(Path(__file__).parent / "molt_history.db"))
+ARCHIVE_ENABLED = os.getenv("MOLT_ARCHIVE",          "true").lower() not in ("0", "false", "no")
+ARCHIVE_DIR     = os.getenv("MOLT_ARCHIVE_DIR",      str(Path(__file__).parent / "archive"))
+AGENT_CACHE     = os.getenv("MOLT_AGENT_CACHE",      str(Path(__file__).parent / "molt_agents.json"))
+AGENT_FETCH     = os.getenv("MOLT_AGENT_FETCH",      "false").lower() in ("1", "true", "yes")
+BACKFILL_STATE  = Path(__file__).parent / "molt_backfill.json"
+LEASE_FILE      = os.getenv("MOLT_LEASE_FILE",       "")      # SQLite di shared mount → mode aktif/standby
+LEASE_BACKEND   = os.getenv("MOLT_LEASE_BACKEND",    "")      # modul:Kelas backend lain
+LEASE_TTL       = float(os.getenv("MOLT_LEASE_TTL",  "10"))
+HOOK_URL        = os.getenv("MOLT_HOOK_URL",         "")      # webhook receiver (POST JSON per event)
+HOOK_DIR        = os.getenv("MOLT_HOOK_DIR",         "")      # folder drop (satu file JSON per event)
+HOOKS_EXTRA     = os.getenv("MOLT_HOOKS",            "")      # modul:Kelas,… hook sendiri
+HOOK_DRAIN      = 10     # detik maksimal kirim sisa event saat shutdown
+
+# ─── Shutdown ──────────────────────────────────────────────────
+STATE_PATH        = Path(__file__).parent / "molt_state.json"
+SHUTDOWN_DEADLINE = 45   # detik maksimal dari SIGTERM/SIGINT sampai proses keluar
+_stop = threading.Event()
+_time_scale = 1.0        # 0 saat --replay → semua tunggu dilewati
+
+# ─── History ───────────────────────────────────────────────────
+_history: History | None = None
+_archive: Archive | None = None
+_agents = AgentCache(None)   # diganti versi persisten di main()
+_cycle: dict = {}        # timing fase battle yang sedang berjalan → history
+_lease: Lease | None = None   # None = tanpa lease (satu host)
+_hooks = HookPipeline()       # diisi & di-start di main(); belum start → emit() no-op
 
 # ─── Session Stats ─────────────────────────────────────────────
+MAX_RECENT = 100   # riwayat di memori dibatasi — mode infinite jalan berminggu-minggu
+
 stats = {
     "start_time": datetime.now(),
     "total":   0,
@@ -57,28 +102,66 @@ logging.basicConfig(
 )
 log = logging.getLogger("MoltBot")
 
+# ─── HTTP Session + Tracing ────────────────────────────────────
+# Satu Session untuk semua request (termasuk SessionKeeper) → hook tracing
+# mencatat method, path, status & durasi setiap call ke span yang aktif.
+# Cookie TIDAK disimpan otomatis — hanya dikirim eksplisit lewat SessionJar (auth=).
+tracer = Tracer(TRACE_FILE, enabled=TRACE_ENABLED)
+_http  = requests.Session()
+_http.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+_http.hooks["response"].append(tracer.on_response)
+
+profiler = Profiler(PROFILE_DIR, every=PROFILE_EVERY)
+
 # ─── Session Keeper (auto-refresh cookie) ─────────────────────
-_keeper = None
+_keeper: SessionKeeper | None = None
+_cfg_jar = SessionJar()   # cookie dari config saat SessionKeeper tidak aktif
 
 def _init_session_keeper():
     global _keeper
-    if not AUTO_VOTE or not SESSION_COOKIE:
+    if not CFG.auto_vote or not CFG.session_cookie:
         return
     try:
-        script_dir = Path(__file__).parent
-        spec = importlib.util.spec_from_file_location(
-            "session_keeper", script_dir / "session_keeper.py"
-        )
-        if not spec:
-            log.warning("  ⚠️  session_keeper.py tidak ditemukan di direktori bot")
-            return
-        mod = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        _keeper = mod.SessionKeeper(cookie_str=SESSION_COOKIE, env_path=ENV_PATH)
+        _keeper = SessionKeeper(cookie_str=CFG.session_cookie, env_path=ENV_PATH, session=_http)
         _keeper.start()
     except Exception as e:
         log.error(f"  ❌ SessionKeeper init error: {e}")
 
+def _cookie_jar() -> SessionJar:
+    """Cookie untuk /run & vote (dipasang lewat auth=) — parse hanya saat cookie berubah."""
+    if _keeper:
+        return _keeper.jar
+    _cfg_jar.load(CFG.session_cookie)
+    return _cfg_jar
+
+
+# ─── Interruptible Wait & State ────────────────────────────────
+def _sleep(seconds: float) -> bool:
+    """Tidur yang bisa dibangunkan sinyal stop. Return True jika bot diminta berhenti."""
+    return _stop.wait(max(0, seconds) * _time_scale)
+
+def _save_state(**state):
+    """Simpan battle yang sedang berjalan agar bisa dilanjutkan setelah restart."""
+    try:
+        tmp = STATE_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps({**state, "saved_at": datetime.now().isoformat()}),
+                       encoding="utf-8")
+        tmp.replace(STATE_PATH)
+    except Exception as e:
+        log.error(f"  Gagal simpan state: {e}")
+
+def _load_state() -> dict | None:
+    try:
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log.warning(f"  ⚠️  State file rusak, diabaikan: {e}")
+        return None
+
+def _clear_state():
+    STATE_PATH.unlink(missing_ok=True)
+
 
 # ─── HTTP Helpers ──────────────────────────────────────────────
 def _h_auth() -> dict:
@@ -86,7 +169,7 @@ def _h_auth() -> dict:
         "accept":          "*/*",
         "accept-language": "en-US,en;q=0.9",
         "content-type":    "application/json",
-        "authorization":   f"Bearer {API_KEY}",
+        "authorization":   f"Bearer {CFG.api_key}",
         "origin":          BASE_URL,
         "referer":         f"{BASE_URL}/battles/new",
         "user-agent":      "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
@@ -103,7 +186,7 @@ def _h_noauth() -> dict:
 
 def api_get(path: str) -> dict | None:
     try:
-        r = requests.get(f"{API_BASE}{path}", headers=_h_noauth(), timeout=30)
+        r = _http.get(f"{API_BASE}{path}", headers=_h_noauth(), timeout=30)
         if r.status_code == 200:
             return r.json()
         log.error(f"GET {path} → {r.status_code}: {r.text[:100]}")
@@ -114,7 +197,7 @@ def api_get(path: str) -> dict | None:
 
 def api_post_auth(path: str, payload: dict) -> dict | None:
     try:
-        r = requests.post(f"{API_BASE}{path}", headers=_h_auth(), json=payload, timeout=30)
+        r = _http.post(f"{API_BASE}{path}", headers=_h_auth(), json=payload, timeout=30)
         log.debug(f"POST {path} → {r.status_code}")
         if r.status_code in (200, 201):
             return r.json()
@@ -126,7 +209,7 @@ def api_post_auth(path: str, payload: dict) -> dict | None:
 def api_post_noauth(path: str) -> dict | None:
     try:
         h = {**_h_noauth(), "content-length": "0"}
-        r = requests.post(f"{API_BASE}{path}", headers=h, timeout=30)
+        r = _http.post(f"{API_BASE}{path}", headers=h, timeout=30)
         log.debug(f"POST {path} → {r.status_code}")
         if r.status_code in (200, 201):
             return r.json()
@@ -138,16 +221,16 @@ def api_post_noauth(path: str) -> dict | None:
 
 # ─── Battle Steps ──────────────────────────────────────────────
 def step1_create() -> dict | None:
-    return api_post_auth("/deploy/battle", {
-        "agent1Id":   AGENT_ID,
-        "rounds":     ROUNDS,
-        "language":   "en",
-        "visibility": "public",
-    })
+    with tracer.span("create", rounds=CFG.rounds):
+        return api_post_auth("/deploy/battle", {
+            "agent1Id":   CFG.agent_id,
+            "rounds":     CFG.rounds,
+            "language":   "en",
+            "visibility": "public",
+        })
 
 def step2_run(battle_id: str) -> bool:
     """Jalankan battle — retry hingga 3x jika server error (500)."""
-    cookie = _keeper.get_cookie() if _keeper else SESSION_COOKIE
     h = {
         "accept":           "*/*",
         "accept-language":  "en-US,en;q=0.9",
@@ -162,64 +245,83 @@ def step2_run(battle_id: str) -> bool:
         "sec-fetch-mode":   "cors",
         "sec-fetch-site":   "same-origin",
     }
-    if cookie:
-        h["cookie"] = cookie
 
-    for attempt in range(1, 4):  # max 3x percobaan
-        try:
-            r = requests.post(f"{API_BASE}/battles/{battle_id}/run", headers=h, timeout=30)
-            log.debug(f"  POST /run -> {r.status_code} (attempt {attempt})")
-            if r.status_code in (200, 201):
-                return True
-            elif r.status_code == 500:
-                log.warning(f"  /run HTTP 500 (attempt {attempt}/3): {r.text[:100]}")
-                if attempt < 3:
-                    wait = attempt * 10  # 10s, 20s
-                    log.info(f"  ⏳ Retry /run dalam {wait}s...")
-                    time.sleep(wait)
-                    continue
-            else:
-                log.warning(f"  /run HTTP {r.status_code}: {r.text[:150]}")
+    with tracer.span("run") as sp:
+        for attempt in range(1, 4):  # max 3x percobaan
+            sp.set("run.attempts", attempt)
+            _cycle["run_attempts"] = attempt
+            wait = 0
+            with tracer.span("run.attempt", attempt=attempt) as at:
+                try:
+                    r = _http.post(f"{API_BASE}/battles/{battle_id}/run", headers=h,
+                                   auth=_cookie_jar(), timeout=30)
+                    log.debug(f"  POST /run -> {r.status_code} (attempt {attempt})")
+                    if r.status_code in (200, 201):
+                        return True
+                    elif r.status_code == 500:
+                        log.warning(f"  /run HTTP 500 (attempt {attempt}/3): {r.text[:100]}")
+                        if attempt < 3:
+                            wait = attempt * 10  # 10s, 20s
+                            log.info(f"  ⏳ Retry /run dalam {wait}s...")
+                    else:
+                        log.warning(f"  /run HTTP {r.status_code}: {r.text[:150]}")
+                        return False
+                except Exception as e:
+                    at.error(e)
+                    log.warning(f"  /run error attempt {attempt}/3: {e}")
+                    if attempt == 3:
+                        return False
+                    wait = 10
+            if wait and _sleep(wait):
                 return False
-        except Exception as e:
-            log.warning(f"  /run error attempt {attempt}/3: {e}")
-            if attempt < 3:
-                time.sleep(10)
-                continue
-            return False
 
+        sp.error("gagal 3x")
     log.warning("  ⚠️  /run gagal 3x — battle mungkin tetap berjalan, lanjut polling...")
     return False
 
 def step3_poll(battle_id: str) -> dict | None:
     done = {"completed", "finished", "done", "ended", "voting"}
     elapsed, max_wait = 0, 300
-    while elapsed < max_wait:
-        time.sleep(15)
-        elapsed += 15
-        data = api_get(f"/battles/{battle_id}")
-        if not data:
-            continue
-        battle = data.get("battle", data)
-        status = str(battle.get("status", "")).lower()
-        cur_r  = battle.get("currentRound", "?")
-        log.info(f"  ⌛ [{status.upper()}] Round {cur_r}/{ROUNDS} | +{elapsed}s")
-        if status in done:
-            if status == "voting":
-                log.info("  🗳️  Status VOTING → auto-vote...")
-                step4_vote(battle_id, AGENT_ID)
-            return battle
+    with tracer.span("poll") as sp:
+        while elapsed < max_wait:
+            if _sleep(15):
+                return None
+            elapsed += 15
+            with tracer.span("poll.tick", elapsed=elapsed) as tick:
+                data = api_get(f"/battles/{battle_id}")
+                if not data:
+                    tick.error("no data")
+                    continue
+                battle = data.get("battle", data)
+                status = str(battle.get("status", "")).lower()
+                cur_r  = battle.get("currentRound", "?")
+                tick.set("battle.status", status)
+                tick.set("battle.round", str(cur_r))
+            log.info(f"  ⌛ [{status.upper()}] Round {cur_r}/{CFG.rounds} | +{elapsed}s")
+            if status in done:
+                sp.set("battle.status", status)
+                if status == "voting":
+                    log.info("  🗳️  Status VOTING → auto-vote...")
+                    step4_vote(battle_id, CFG.agent_id)
+                return battle
+        sp.error("timeout")
     return None
 
 def step4_vote(battle_id: str, agent_id: str, _retry: bool = False) -> bool:
-    if not AUTO_VOTE:
+    if not CFG.auto_vote:
         return False
-    cookie = _keeper.get_cookie() if _keeper else SESSION_COOKIE
-    if not cookie:
+    with tracer.span("vote", retry=_retry) as sp:
+        ok = _vote(battle_id, agent_id, _retry)
+        sp.set("vote.ok", ok)
+        return ok
+
+def _vote(battle_id: str, agent_id: str, _retry: bool) -> bool:
+    jar = _cookie_jar()
+    if not jar:
         log.warning("  ⚠️  Vote dilewati: MOLT_SESSION_COOKIE belum diset")
         return False
     try:
-        r = requests.post(
+        r = _http.post(
             f"{API_BASE}/battles/{battle_id}/vote",
             headers={
                 "accept":           "*/*",
@@ -234,8 +336,8 @@ def step4_vote(battle_id: str, agent_id: str, _retry: bool = False) -> bool:
                 "sec-fetch-dest":   "empty",
                 "sec-fetch-mode":   "cors",
                 "sec-fetch-site":   "same-origin",
-                "cookie":           cookie,
             },
+            auth=jar,
             json={"agentId": agent_id},
             timeout=15,
         )
@@ -251,7 +353,9 @@ def step4_vote(battle_id: str, agent_id: str, _retry: bool = False) -> bool:
             return False
         elif r.status_code == 401:
             if not _retry and _keeper:
-                ok = _keeper.handle_401()
+                with tracer.span("vote.refresh_401") as rs:
+                    ok = _keeper.handle_401()
+                    rs.set("refresh.ok", ok)
                 if ok:
                     return step4_vote(battle_id, agent_id, _retry=True)
             elif not _retry:
@@ -274,7 +378,6 @@ def step5_wait_final(battle_id: str, voting_battle: dict | None = None) -> dict
     Tunggu server finalize result setelah timer voting habis.
     Fetch fresh API di awal untuk dapat votingEndsAt terbaru.
     """
-    from datetime import timezone, datetime as _dt
     final_status = {"completed", "finished", "done", "ended"}
 
     # ── Fetch fresh data untuk dapat votingEndsAt terbaru ────
@@ -287,7 +390,63 @@ def step5_wait_final(battle_id: str, voting_battle: dict | None = None) -> dict
         log.info("  ✅ Battle sudah completed!")
         return battle_data
 
-    # ── Hitung sisa waktu voting dari votingEndsAt ────────────
+    t0 = time.monotonic()
+    with tracer.span("voting_wait") as sp:
+        wait_before_poll = _voting_wait_seconds(battle_data)
+        sp.set("voting.wait_s", round(wait_before_poll, 1))
+
+        # ── Tunggu dengan log progress tiap 60 detik ─────────
+        slept = 0
+        while slept < wait_before_poll:
+            chunk = min(60, wait_before_poll - slept)
+            if _sleep(chunk):
+                return None
+            slept += chunk
+            remaining = wait_before_poll - slept
+            if remaining > 10:
+                log.info(f"  ⏳ Voting berlangsung... {int(remaining)}s lagi")
+
+    _cycle["t_voting"] = time.monotonic() - t0
+
+    # ── Poll hasil — max 8 menit ──────────────────────────────
+    log.info("  🔍 Voting selesai → ambil hasil final...")
+    t0 = time.monotonic()
+    with tracer.span("final_poll") as sp:
+        max_poll = 480
+        elapsed  = 0
+        while elapsed < max_poll:
+            with tracer.span("final_poll.tick", elapsed=elapsed) as tick:
+                data = api_get(f"/battles/{battle_id}")
+                if data:
+                    battle = data.get("battle", data)
+                    status = str(battle.get("status", "")).lower()
+                    winner = battle.get("winnerId")
+                    vote_a = battle.get("voteCountA", 0)
+                    vote_b = battle.get("voteCountB", 0)
+                    tick.set("battle.status", status)
+                    log.info(f"  ⌛ [{status.upper()}] winner={'✅' if winner else '⏳'} | votes={vote_a}:{vote_b} | +{elapsed}s")
+                    if winner is not None or status in final_status:
+                        _cycle["t_final"] = time.monotonic() - t0
+                        log.info("  ✅ Hasil final diterima!" if winner is not None
+                                 else "  ✅ Battle completed!")
+                        return battle
+                else:
+                    tick.error("no data")
+            if _sleep(15):
+                return None
+            elapsed += 15
+
+        sp.error("timeout")
+        log.warning("  ⚠️  Timeout poll hasil — ambil data terakhir")
+        data = api_get(f"/battles/{battle_id}")
+        _cycle["t_final"] = time.monotonic() - t0
+        return data.get("battle", data) if data else None
+
+
+def _voting_wait_seconds(battle_data: dict) -> float:
+    """Hitung sisa waktu voting dari votingEndsAt (+25s buffer), fallback 340s."""
+    from datetime import timezone, datetime as _dt
+
     wait_before_poll = 0
     voting_ends_str  = battle_data.get("votingEndsAt", "")
 
@@ -309,71 +468,29 @@ def step5_wait_final(battle_id: str, voting_battle: dict | None = None) -> dict
         # Fallback: estimasi 5m 20s dari sekarang (default voting timer MoltArena)
         wait_before_poll = 340
         log.info(f"  ⏳ votingEndsAt belum tersedia → estimasi {wait_before_poll//60}m {wait_before_poll%60}s...")
-
-    # ── Tunggu dengan log progress tiap 60 detik ─────────────
-    slept = 0
-    while slept < wait_before_poll:
-        chunk = min(60, wait_before_poll - slept)
-        time.sleep(chunk)
-        slept += chunk
-        remaining = wait_before_poll - slept
-        if remaining > 10:
-            log.info(f"  ⏳ Voting berlangsung... {int(remaining)}s lagi")
-
-    # ── Poll hasil — max 8 menit ──────────────────────────────
-    log.info("  🔍 Voting selesai → ambil hasil final...")
-    max_poll = 480
-    elapsed  = 0
-    while elapsed < max_poll:
-        data = api_get(f"/battles/{battle_id}")
-        if data:
-            battle = data.get("battle", data)
-            status = str(battle.get("status", "")).lower()
-            winner = battle.get("winnerId")
-            vote_a = battle.get("voteCountA", 0)
-            vote_b = battle.get("voteCountB", 0)
-            log.info(f"  ⌛ [{status.upper()}] winner={'✅' if winner else '⏳'} | votes={vote_a}:{vote_b} | +{elapsed}s")
-            if winner is not None:
-                log.info("  ✅ Hasil final diterima!")
-                return battle
-            if status in final_status:
-                log.info("  ✅ Battle completed!")
-                return battle
-        time.sleep(15)
-        elapsed += 15
-
-    log.warning("  ⚠️  Timeout poll hasil — ambil data terakhir")
-    data = api_get(f"/battles/{battle_id}")
-    return data.get("battle", data) if data else None
+    return wait_before_poll
 
 
 # ─── Tampilkan Hasil ───────────────────────────────────────────
 def show_result(battle: dict, my_id: str) -> str:
     if not battle:
         return "skip"
-    agent_a   = battle.get("agentA") or {}
-    agent_b   = battle.get("agentB") or {}
-    name_a    = agent_a.get("name", "Agent A")
-    name_b    = agent_b.get("name", "Agent B")
-    id_a      = agent_a.get("id", "")
-    winner_id = battle.get("winnerId")
+    me, opp, me_a = _agents.sides(battle, my_id)
     vote_a    = battle.get("voteCountA", 0)
     vote_b    = battle.get("voteCountB", 0)
     topic     = battle.get("topic", "?")
     bnum      = battle.get("battleNumber", "?")
     url       = f"{BASE_URL}/battle/{battle.get('id','?')}"
 
-    my_name = name_a if my_id == id_a else name_b
-    op_name = name_b if my_id == id_a else name_a
-    my_vote = vote_a if my_id == id_a else vote_b
-    op_vote = vote_b if my_id == id_a else vote_a
+    my_name = me["name"]
+    op_name = opp["name"]
+    my_vote = vote_a if me_a else vote_b
+    op_vote = vote_b if me_a else vote_a
 
-    if winner_id is None:
-        outcome, icon, label = "draw", "🤝", "DRAW  "
-    elif winner_id == my_id:
-        outcome, icon, label = "win",  "🏆", "MENANG"
-    else:
-        outcome, icon, label = "lose", "💀", "KALAH "
+    outcome = outcome_of(battle, my_id)
+    icon, label = {"win":  ("🏆", "MENANG"),
+                   "lose": ("💀", "KALAH "),
+                   "draw": ("🤝", "DRAW  ")}[outcome]
 
     log.info("")
     log.info("  ╔══════════════════════════════════════════════════╗")
@@ -408,6 +525,14 @@ def print_summary():
     log.info(f"  ║  ⏭️  Skip/Error  : {stats['skip']:<32}║")
     log.info(f"  ║  🗳️  Auto-Vote   : {stats['voted']:<32}║")
     log.info(f"  ║  📈 Win Rate    : {wr:<32}║")
+    ac = _agents.stats()
+    if ac["hit_rate"] is not None:
+        cache = f"{ac['size']} agent, hit {ac['hit_rate']*100:.0f}%"
+        log.info(f"  ║  🗂️  Cache Agent : {cache:<32}║")
+    hs = _hooks.stats()
+    if hs["queued"] or hs["dropped"]:
+        hook = f"{hs['delivered']} ok, {hs['failed']} gagal, {hs['dropped']} drop, {hs['late']} telat"
+        log.info(f"  ║  🪝 Hooks       : {hook:<32}║")
     log.info("  ╠══════════════════════════════════════════════════╣")
     if stats["battles"]:
         log.info("  ║  📋 Riwayat (10 terakhir):                        ║")
@@ -419,62 +544,394 @@ def print_summary():
 
 
 # ─── Countdown ─────────────────────────────────────────────────
-def countdown(seconds: int):
+def countdown(seconds: int) -> bool:
+    """Cooldown antar battle. Return True jika dihentikan sinyal stop."""
     log.info(f"  ⏳ Cooldown {seconds//60}m {seconds%60}s...")
-    end      = time.time() + seconds
-    next_log = time.time() + 60
-    while time.time() < end:
-        time.sleep(1)
-        if time.time() >= next_log:
-            rem = int(end - time.time())
+    rem = seconds
+    while rem > 0:
+        chunk = min(60, rem)
+        if _sleep(chunk):
+            return True
+        rem -= chunk
+        if rem > 0:
             log.info(f"  ⌛ Sisa cooldown: {rem//60}m {rem%60}s")
-            next_log = time.time() + 60
     log.info("  ✅ Cooldown selesai!\n")
+    return False
 
 
 # ─── Validasi ──────────────────────────────────────────────────
 def validate():
-    errs = []
-    if not AGENT_ID:
-        errs.append("MOLT_AGENT_ID belum diset")
-    if not API_KEY:
-        errs.append("MOLT_API_KEY belum diset\n"
-                    "  → moltarena.crosstoken.io/settings/api → Generate Key")
-    elif not API_KEY.startswith("pk_live_"):
-        errs.append("MOLT_API_KEY harus dimulai 'pk_live_'")
+    errs = _CFG_ERRS
     for e in errs:
         log.error(f"❌ {e}")
     if errs:
         sys.exit(1)
 
 
+# ─── Hot Reload Config ─────────────────────────────────────────
+def _reload_config():
+    """Terapkan perubahan .env di batas battle — HTTP session & SessionKeeper tetap hidup."""
+    global CFG
+    new = _watcher.poll() if _watcher else None
+    if not new:
+        return
+    changed = CFG.diff(new)
+    # Cookie yang baru saja ditulis SessionKeeper sendiri bukan perubahan dari user
+    if _keeper and new.session_cookie == _keeper.get_cookie():
+        changed = [c for c in changed if c != "session_cookie"]
+    for name in changed:
+        log.info(f"  🔧 Config {name}: {CFG.show(name)} → {new.show(name)}")
+    CFG = new
+    if "session_cookie" in changed or "auto_vote" in changed:
+        if _keeper:
+            _keeper.update_cookie(CFG.session_cookie)
+        else:
+            _init_session_keeper()
+
+
+def _open_history(path: str | Path):
+    global _history
+    try:
+        _history = History(path)
+    except Exception as e:
+        log.error(f"  ❌ History DB tidak bisa dibuka ({path}): {e}")
+
+
+def _fetch_agent(agent_id: str) -> dict | None:
+    data = api_get(f"/agents/{agent_id}")
+    return data.get("agent", data) if data else None
+
+
+def _open_agents(path: str | Path):
+    global _agents
+    _agents = AgentCache(path, fetch=_fetch_agent if AGENT_FETCH else None)
+    if len(_agents):
+        log.info(f"  🗂️  Cache agent: {len(_agents)} agent dari {Path(path).name}")
+
+
+def _open_archive(path: str | Path):
+    global _archive
+    if not ARCHIVE_ENABLED:
+        return
+    try:
+        _archive = Archive(path)
+    except Exception as e:
+        log.error(f"  ❌ Folder arsip tidak bisa dibuka ({path}): {e}")
+
+
+def _open_lease():
+    """Lease per agent jika MOLT_LEASE_FILE / MOLT_LEASE_BACKEND diset. Gagal buka → keluar
+    (lebih aman daripada jalan tanpa lease dan berisiko battle ganda)."""
+    global _lease
+    if not (LEASE_FILE or LEASE_BACKEND):
+        return
+    try:
+        backend = load_backend(LEASE_BACKEND) if LEASE_BACKEND else SQLiteLeaseBackend(LEASE_FILE)
+    except Exception as e:
+        log.error(f"  ❌ Backend lease tidak bisa dibuka ({LEASE_BACKEND or LEASE_FILE}): {e}")
+        sys.exit(1)
+    _lease = Lease(backend, f"agent:{CFG.agent_id}", ttl=LEASE_TTL)
+    log.info(f"  🔐 Lease: {_lease.name} sebagai {_lease.holder} (TTL {LEASE_TTL:g}s)")
+
+
+def _open_hooks(replay: bool = False):
+    """History selalu lewat hook; sink eksternal tidak dipakai saat --replay."""
+    if _history is not None:
+        _hooks.register(HistoryHook(_history))
+    if not replay:
+        try:
+            if HOOK_URL:
+                _hooks.register(WebhookHook(HOOK_URL))
+            if HOOK_DIR:
+                _hooks.register(FileDropHook(HOOK_DIR))
+            for h in load_hooks(HOOKS_EXTRA):
+                _hooks.register(h)
+        except Exception as e:
+            log.error(f"  ❌ Hook tidak bisa dipasang: {e}")
+    _hooks.start()
+
+
+# ─── Record / Replay ───────────────────────────────────────────
+def _start_recording(path: str) -> RecordingAdapter:
+    adapter = RecordingAdapter(path, config={
+        "agent_id":    CFG.agent_id,
+        "rounds":      CFG.rounds,
+        "delay_sec":   CFG.delay_sec,
+        "auto_vote":   CFG.auto_vote,
+        "has_cookie":  bool(CFG.session_cookie),
+    })
+    _http.mount("https://", adapter)
+    _http.mount("http://",  adapter)
+    log.info(f"  📼 Merekam traffic HTTP → {path} (kredensial di-scrub)")
+    return adapter
+
+
+def _start_replay(path: str) -> tuple[ReplayAdapter, int]:
+    """
+    Ganti transport dengan cassette. Config diambil dari header cassette,
+    semua tunggu dilewati, file .env / state / trace diarahkan ke folder
+    sementara agar file produksi tidak tersentuh. Return (adapter, jumlah battle).
+    """
+    global CFG, _CFG_ERRS, ENV_PATH, STATE_PATH, _time_scale
+    cas = Cassette(path)
+    c   = cas.config
+    tmp = Path(tempfile.mkdtemp(prefix="molt_replay_"))
+    ENV_PATH, STATE_PATH = tmp / ".env", tmp / "molt_state.json"
+    tracer.path = tmp / "molt_traces.jsonl"
+    CFG = Config(
+        agent_id       = c.get("agent_id", "replay"),
+        api_key        = "pk_live_replay",
+        delay_sec      = c.get("delay_sec", 0),
+        rounds         = c.get("rounds", 5),
+        auto_vote      = c.get("auto_vote", False),
+        session_cookie = "replay=1" if c.get("has_cookie") else "",
+    )
+    _CFG_ERRS   = []
+    _time_scale = 0
+    adapter = ReplayAdapter(cas)
+    _http.mount("https://", adapter)
+    _http.mount("http://",  adapter)
+    log.info(f"  📼 Replay {path}: {len(cas.entries)} request, {cas.battles} battle")
+    return adapter, cas.battles
+
+
 # ─── Signal Handler ────────────────────────────────────────────
+def _force_exit():
+    log.warning(f"  ⛔ Shutdown melewati {SHUTDOWN_DEADLINE}s — keluar paksa (state tersimpan)")
+    logging.shutdown()
+    os._exit(1)
+
 def _on_exit(sig, frame):
-    log.info("\n⛔ Bot dihentikan\n")
-    if _keeper:
-        _keeper.stop()
-    print_summary()
-    sys.exit(0)
+    """
+    Hanya set flag — loop utama berhenti di titik tunggu berikutnya.
+    Request HTTP yang sedang berjalan (termasuk refresh 401 + retry vote)
+    dibiarkan selesai. Sinyal kedua atau lewat deadline → keluar paksa.
+    """
+    if _stop.is_set():
+        _force_exit()
+    _stop.set()
+    log.info(f"\n⛔ Bot dihentikan — menyelesaikan langkah terakhir (maks {SHUTDOWN_DEADLINE}s)...\n")
+    t = threading.Timer(SHUTDOWN_DEADLINE, _force_exit)
+    t.daemon = True
+    t.start()
+
+
+# ─── Jalankan Satu Battle (Step 2–5) ───────────────────────────
+def play_battle(battle_id: str, bnum, opp_name: str, phase: str = "run") -> str | None:
+    """
+    Jalankan battle dari `phase` ("run" / "poll" / "voting") sampai hasil final.
+    Setiap fase disimpan ke STATE_PATH. Return outcome, atau None jika bot
+    dihentikan di tengah jalan — state tetap tersimpan untuk dilanjutkan.
+    """
+    res = _play_phases(battle_id, bnum, opp_name, phase)
+    if res is None:
+        return None
+    outcome, battle = res
+    _clear_state()
+    _on_result(battle_id, bnum, opp_name, outcome, battle)
+    return outcome
+
+
+def _play_phases(battle_id: str, bnum, opp_name: str, phase: str) -> tuple[str, dict | None] | None:
+    state  = {"battle_id": battle_id, "bnum": bnum, "opponent": opp_name}
+    result = None
+
+    if phase == "run":
+        _save_state(**state, phase="run")
+        log.info("  ▶️  Step 2: Jalankan battle...")
+        t0 = time.monotonic()
+        ok = step2_run(battle_id)
+        _cycle["t_run"] = time.monotonic() - t0
+        if _stop.is_set():
+            return None
+        log.info("  ✅ Running!" if ok else "  ⚠️  /run error, tetap polling...")
+        phase = "poll"
+
+    if phase == "poll":
+        _save_state(**state, phase="poll")
+        log.info("  🔄 Step 3: Polling hasil...")
+        t0 = time.monotonic()
+        if _sleep(5):
+            return None
+        result = step3_poll(battle_id)
+        _cycle["t_poll"] = time.monotonic() - t0
+        if _stop.is_set():
+            return None
+        if not result:
+            log.warning("  ⚠️  Polling timeout")
+            _hooks.emit("on_error", phase="poll", battle_id=battle_id, battle_num=bnum,
+                        message="polling timeout")
+            return "skip", None
+        if str(result.get("status", "")).lower() != "voting":
+            # Battle langsung selesai tanpa fase voting
+            log.info("  🗳️  Battle selesai → auto-vote...")
+            step4_vote(battle_id, CFG.agent_id)
+            return show_result(result, CFG.agent_id), result
+        # Vote dulu selama masih di fase voting
+        log.info("  🗳️  Step 4: Auto-vote...")
+        step4_vote(battle_id, CFG.agent_id)
+
+    # Step 5: Tunggu hasil final — pakai votingEndsAt dari data battle
+    _save_state(**state, phase="voting")
+    log.info("  🏁 Step 5: Tunggu hasil final...")
+    _hooks.emit("on_voting", battle_id=battle_id, battle_num=bnum, opponent=opp_name,
+                voting_ends_at=(result or {}).get("votingEndsAt"))
+    final = step5_wait_final(battle_id, voting_battle=result)
+    if _stop.is_set():
+        return None
+    return show_result(final or result, CFG.agent_id), final or result
+
+
+def _on_result(battle_id: str, bnum, opp_name: str, outcome: str, battle: dict | None):
+    """Payload final ke arsip, lalu event on_result (record history + timing fase dari _cycle)
+    ke pipeline hook — tulis history & sink lain berjalan di worker, bukan di loop battle."""
+    if _archive is not None and battle:
+        try:
+            _archive.append(battle, bnum)
+        except Exception as e:
+            log.error(f"  ❌ Gagal arsipkan battle: {e}")
+    b = battle or {}
+    _, opp, mine_a = _agents.sides(b, CFG.agent_id)
+    vote_a, vote_b = b.get("voteCountA"), b.get("voteCountB")
+    _agents.save()
+    record = {
+        "battle_num":   bnum,
+        "battle_id":    battle_id,
+        "agent_id":     CFG.agent_id,
+        "opponent_id":  opp.get("id"),
+        "opponent":     opp["name"] if opp["name"] != UNKNOWN else opp_name,
+        "topic":        b.get("topic"),
+        "rounds":       CFG.rounds,
+        "outcome":      outcome,
+        "vote_my":      vote_a if mine_a else vote_b,
+        "vote_op":      vote_b if mine_a else vote_a,
+        "created_at":   _cycle.get("created_at"),
+        "finished_at":  time.time(),
+        "run_attempts": _cycle.get("run_attempts"),
+        "t_create":     _cycle.get("t_create"),
+        "t_run":        _cycle.get("t_run"),
+        "t_poll":       _cycle.get("t_poll"),
+        "t_voting":     _cycle.get("t_voting"),
+        "t_final":      _cycle.get("t_final"),
+        "source":       "live",
+    }
+    _hooks.emit("on_result", battle_id=battle_id, battle_num=bnum, opponent=record["opponent"],
+                outcome=outcome, record=record, battle=battle)
+
+
+def _remember(bnum, opp_name: str, outcome: str):
+    stats["battles"].append({
+        "num":      bnum,
+        "opponent": opp_name,
+        "outcome":  outcome,
+    })
+    del stats["battles"][:-MAX_RECENT]
+
+
+def _record(bnum, opp_name: str, outcome: str):
+    if outcome == "win":    stats["win"]  += 1
+    elif outcome == "lose": stats["lose"] += 1
+    elif outcome == "draw": stats["draw"] += 1
+    else:                   stats["skip"] += 1
+    _remember(bnum, opp_name, outcome)
+    profiler.battle_done()
+
+
+def _resume_pending():
+    """Lanjutkan battle yang terpotong shutdown sebelumnya (dari STATE_PATH)."""
+    st = _load_state()
+    if not st or not st.get("battle_id"):
+        return
+    bnum, opp = st.get("bnum", "?"), st.get("opponent", "?")
+    # /run tidak dikirim ulang — battle mungkin sudah berjalan
+    phase = "voting" if st.get("phase") == "voting" else "poll"
+    log.info(f"  ♻️  Lanjutkan battle #{bnum} dari sesi sebelumnya (fase {st.get('phase')})...")
+    _cycle.clear()
+    with tracer.trace("battle.resume", **{"battle.id": st["battle_id"], "battle.number": str(bnum),
+                                          "battle.phase": phase}) as root:
+        outcome = play_battle(st["battle_id"], bnum, opp, phase=phase)
+        root.set("battle.outcome", outcome or "interrupted")
+    if outcome is not None:
+        stats["total"] += 1
+        _record(bnum, opp, outcome)
+
+
+# ─── Backfill ──────────────────────────────────────────────────
+def run_backfill():
+    """Isi history dari riwayat battle di API (bisa dilanjutkan setelah Ctrl+C)."""
+    signal.signal(signal.SIGINT,  _on_exit)
+    signal.signal(signal.SIGTERM, _on_exit)
+    validate()
+    _open_history(HISTORY_DB)
+    if _history is None:
+        sys.exit(1)
+    _open_agents(AGENT_CACHE)
+    # Pool koneksi cukup untuk semua worker (default requests: 10 per host)
+    _http.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=max(10, BACKFILL_WORKERS)))
+
+    before = _history.count()
+    with tracer.trace("backfill", **{"agent.id": CFG.agent_id}) as root:
+        res = Backfill(_http, API_BASE, _h_auth, CFG.agent_id, _history, _agents,
+                       checkpoint=BACKFILL_STATE, stop=_stop).run()
+        root.set("backfill.pages", res["pages_done"])
+        root.set("backfill.requests", res["requests"])
+    after = _history.count()
+    _history.close()
+    _agents.save()
+
+    pages = f"{res['pages_done']}/{res['total_pages'] or '?'}"
+    log.info(f"  📥 Backfill {'selesai' if res['complete'] else 'terhenti'}: {pages} halaman, "
+             f"{res['records']} battle, {res['requests']} request, {res['elapsed']}s")
+    log.info(f"  📚 History: {before} → {after} battle")
+    if not res["complete"]:
+        log.info("  ♻️  Jalankan --backfill lagi untuk melanjutkan dari checkpoint")
+
+
+def run_doctor(samples: int = DOCTOR_SAMPLES, as_json: bool = False) -> int:
+    """Ukur latency endpoint + cek API key & cookie tanpa membuat battle. Return exit code."""
+    validate()
+    if not as_json:
+        log.info(f"  🩺 Doctor: {samples} sampel per endpoint...")
+    with tracer.trace("doctor", **{"agent.id": CFG.agent_id}):
+        rep = Doctor(_http, API_BASE, CFG.agent_id, _h_auth(), CFG.session_cookie,
+                     samples=samples).run()
+    if as_json:
+        print(json.dumps(rep, indent=2, ensure_ascii=False))
+    else:
+        print_report(rep)
+    checks = rep["checks"]
+    return 1 if checks["api_key"]["ok"] is False or (CFG.auto_vote and checks["cookie"]["ok"] is False) else 0
 
 
 # ─── Main ──────────────────────────────────────────────────────
-def main(max_override: int = None):
-    max_b = max_override if max_override is not None else MAX_BATTLES
+def main(max_override: int = None, profile: bool = False,
+         record: str | None = None, replay: str | None = None):
+    recorder = _start_recording(record) if record else None
+    replayer = None
+    if replay:
+        replayer, n_battles = _start_replay(replay)
+        if max_override is None:
+            max_override = max(1, n_battles)
+    max_b = max_override if max_override is not None else CFG.max_battles
+
+    global _watcher
 
     signal.signal(signal.SIGINT,  _on_exit)
     signal.signal(signal.SIGTERM, _on_exit)
+    profiler.enabled = profile
+    profiler.start()
 
     sep = "═" * 58
     log.info(sep)
     log.info("  🥊  MoltArena Auto Battle Bot v10")
     log.info("  ─────────────────────────────────────────────────────")
-    log.info(f"  🔑 API Key  : {API_KEY[:14]}...{API_KEY[-4:]}")
-    log.info(f"  🤖 Agent    : {AGENT_ID}")
-    log.info(f"  🎯 Rounds   : {ROUNDS}")
-    log.info(f"  ⏱️  Delay    : {DELAY_SEC//60}m {DELAY_SEC%60}s")
+    log.info(f"  🔑 API Key  : {CFG.api_key[:14]}...{CFG.api_key[-4:]}")
+    log.info(f"  🤖 Agent    : {CFG.agent_id}")
+    log.info(f"  🎯 Rounds   : {CFG.rounds}")
+    log.info(f"  ⏱️  Delay    : {CFG.delay_sec//60}m {CFG.delay_sec%60}s")
     log.info(f"  🔄 Max      : {'∞ infinite' if max_b==0 else f'{max_b} battles'}")
-    if AUTO_VOTE:
-        if SESSION_COOKIE:
+    if CFG.auto_vote:
+        if CFG.session_cookie:
             log.info("  🗳️  Auto-Vote : ✅ Aktif — token refresh setiap 45 menit")
         else:
             log.info("  🗳️  Auto-Vote : ⚠️  Aktif tapi MOLT_SESSION_COOKIE belum diset")
@@ -484,15 +941,37 @@ def main(max_override: int = None):
 
     validate()
     stats["start_time"] = datetime.now()
-
-    _init_session_keeper()
-
-    log.info("🚀 Auto battle dimulai! (Ctrl+C untuk stop + lihat summary)\n")
+    _open_history(HISTORY_DB if not replay else STATE_PATH.with_name("molt_history.db"))
+    _open_archive(ARCHIVE_DIR if not replay else STATE_PATH.with_name("archive"))
+    _open_agents(AGENT_CACHE if not replay else STATE_PATH.with_name("molt_agents.json"))
+    _open_hooks(replay=bool(replay))
+
+    _watcher = ConfigWatcher(ENV_PATH, CFG)
+    _watcher.start()
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, _watcher.request_reload)
+
+    # Standby menunggu di sini — session keeper & battle tertunda hanya milik leader
+    if not replay:
+        _open_lease()
+    if not _lease or _lease.wait_leader(_stop):
+        _init_session_keeper()
+        _resume_pending()
+        log.info("🚀 Auto battle dimulai! (Ctrl+C untuk stop + lihat summary)\n")
 
     count = 0
-    while True:
+    while not _stop.is_set():
+        _reload_config()
+        if max_override is None:
+            max_b = CFG.max_battles
+        # Fencing: token lease harus masih berlaku tepat sebelum membuat battle
+        if _lease and not _lease.fence():
+            log.warning("  ⚠️  Bukan leader lagi → kembali standby")
+            if not _lease.wait_leader(_stop):
+                break
+            continue
         count += 1
-        stats["total"] = count
+        stats["total"] += 1
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         log.info(f"{'─'*58}")
@@ -500,114 +979,111 @@ def main(max_override: int = None):
         log.info(f"{'─'*58}")
 
         log.info("  📤 Step 1: Buat battle...")
-        r1 = step1_create()
-
-        if not r1 or r1.get("_error"):
-            s    = (r1 or {}).get("_status", 0)
-            body = (r1 or {}).get("_body", "")
-
-            # Coba parse pesan error dari server
-            server_msg = ""
-            try:
-                import json as _json
-                err_data   = _json.loads(body)
-                server_msg = (err_data.get("message") or err_data.get("error")
-                              or err_data.get("detail") or "")
-            except Exception:
-                server_msg = body[:120] if body else ""
-
-            if s in (401, 403):
-                log.error(f"  ❌ API Key ditolak ({s}) → bot berhenti")
-                print_summary(); sys.exit(1)
-            elif s == 429:
-                log.warning("  🚦 Rate limit → tunggu 5 menit...")
-                stats["skip"] += 1; stats["total"] -= 1; count -= 1
-                time.sleep(300); continue
-            elif s == 400:
-                log.warning(f"  ⚠️  Gagal buat battle (HTTP 400)")
-                if server_msg:
-                    log.warning(f"  📋 Pesan server: {server_msg}")
-
-                # Deteksi apakah agent sedang dalam battle aktif
-                busy_keywords = ("already", "active", "ongoing", "in progress",
-                                 "sedang", "berlangsung", "cooldown", "busy",
-                                 "pending", "running", "duplicate")
-                is_busy = any(kw in server_msg.lower() for kw in busy_keywords)
-
-                if is_busy:
-                    wait_busy = 120  # tunggu 2 menit lalu retry
-                    log.warning(f"  ⏳ Agent masih dalam battle aktif → tunggu {wait_busy}s lalu retry...")
-                    stats["total"] -= 1; count -= 1
-                    time.sleep(wait_busy); continue
+        with tracer.trace("battle", **{"agent.id": CFG.agent_id, "battle.rounds": CFG.rounds}) as root:
+            _cycle.clear()
+            _cycle["created_at"] = time.time()
+            if _lease:
+                root.set("lease.token", _lease.token)
+            t0 = time.monotonic()
+            r1 = step1_create()
+            _cycle["t_create"] = time.monotonic() - t0
+
+            if not r1 or r1.get("_error"):
+                s    = (r1 or {}).get("_status", 0)
+                body = (r1 or {}).get("_body", "")
+                root.error(f"create HTTP {s}")
+
+                # Coba parse pesan error dari server
+                server_msg = ""
+                try:
+                    import json as _json
+                    err_data   = _json.loads(body)
+                    server_msg = (err_data.get("message") or err_data.get("error")
+                                  or err_data.get("detail") or "")
+                except Exception:
+                    server_msg = body[:120] if body else ""
+                _hooks.emit("on_error", phase="create", status=s, message=server_msg)
+
+                if s in (401, 403):
+                    log.error(f"  ❌ API Key ditolak ({s}) → bot berhenti")
+                    _hooks.stop(HOOK_DRAIN); print_summary(); sys.exit(1)
+                elif s == 429:
+                    log.warning("  🚦 Rate limit → tunggu 5 menit...")
+                    stats["skip"] += 1; stats["total"] -= 1; count -= 1
+                    _sleep(300); continue
+                elif s == 400:
+                    log.warning(f"  ⚠️  Gagal buat battle (HTTP 400)")
+                    if server_msg:
+                        log.warning(f"  📋 Pesan server: {server_msg}")
+
+                    # Deteksi apakah agent sedang dalam battle aktif
+                    busy_keywords = ("already", "active", "ongoing", "in progress",
+                                     "sedang", "berlangsung", "cooldown", "busy",
+                                     "pending", "running", "duplicate")
+                    is_busy = any(kw in server_msg.lower() for kw in busy_keywords)
+
+                    if is_busy:
+                        wait_busy = 120  # tunggu 2 menit lalu retry
+                        log.warning(f"  ⏳ Agent masih dalam battle aktif → tunggu {wait_busy}s lalu retry...")
+                        stats["total"] -= 1; count -= 1
+                        _sleep(wait_busy); continue
+                    else:
+                        log.warning("  ⏭️  Skipping → lanjut ke battle berikutnya")
+                        stats["skip"] += 1
+                        _remember("?", "?", "skip")
                 else:
-                    log.warning("  ⏭️  Skipping → lanjut ke battle berikutnya")
+                    log.warning(f"  ⚠️  Gagal buat battle (HTTP {s})")
+                    if server_msg:
+                        log.warning(f"  📋 Pesan server: {server_msg}")
                     stats["skip"] += 1
-                    stats["battles"].append({"num":"?","opponent":"?","outcome":"skip"})
-            else:
-                log.warning(f"  ⚠️  Gagal buat battle (HTTP {s})")
-                if server_msg:
-                    log.warning(f"  📋 Pesan server: {server_msg}")
-                stats["skip"] += 1
-                stats["battles"].append({"num":"?","opponent":"?","outcome":"skip"})
-        else:
-            battle_raw = r1.get("battle", r1)
-            battle_id  = battle_raw.get("id") or r1.get("battleId", "")
-            bnum       = battle_raw.get("battleNumber", "?")
-            topic      = battle_raw.get("topic", "?")
-            agent_b    = (battle_raw.get("participants", {}).get("agent2") or
-                          battle_raw.get("agentB") or {})
-            opp_name   = agent_b.get("name", agent_b.get("displayName", "Random"))
-
-            log.info(f"  ✅ Battle #{bnum} dibuat!")
-            log.info(f"  📌 Topic: {topic}")
-            log.info(f"  🆚 Lawan: {opp_name}")
-
-            log.info("  ▶️  Step 2: Jalankan battle...")
-            ok = step2_run(battle_id)
-            log.info("  ✅ Running!" if ok else "  ⚠️  /run error, tetap polling...")
-
-            log.info("  🔄 Step 3: Polling hasil...")
-            time.sleep(5)
-            result = step3_poll(battle_id)
-
-            if result:
-                status_now = str(result.get("status","")).lower()
-
-                # Vote dulu jika masih di fase voting
-                if status_now == "voting":
-                    log.info("  🗳️  Step 4: Auto-vote...")
-                    step4_vote(battle_id, AGENT_ID)
-                    # Step 5: Tunggu hasil final — pakai votingEndsAt dari data battle
-                    log.info("  🏁 Step 5: Tunggu hasil final...")
-                    final = step5_wait_final(battle_id, voting_battle=result)
-                    result = final if final else result
-                else:
-                    # Battle langsung selesai tanpa fase voting
-                    log.info("  🗳️  Battle selesai → auto-vote...")
-                    step4_vote(battle_id, AGENT_ID)
-
-                outcome = show_result(result, AGENT_ID)
+                    _remember("?", "?", "skip")
             else:
-                log.warning("  ⚠️  Polling timeout")
-                outcome = "skip"
-
-            if outcome == "win":    stats["win"]  += 1
-            elif outcome == "lose": stats["lose"] += 1
-            elif outcome == "draw": stats["draw"] += 1
-            else:                   stats["skip"] += 1
-
-            stats["battles"].append({
-                "num":      bnum,
-                "opponent": opp_name,
-                "outcome":  outcome,
-            })
+                battle_raw = r1.get("battle", r1)
+                battle_id  = battle_raw.get("id") or r1.get("battleId", "")
+                bnum       = battle_raw.get("battleNumber", "?")
+                topic      = battle_raw.get("topic", "?")
+                opp_name   = _agents.sides(battle_raw, CFG.agent_id)[1]["name"]
+
+                log.info(f"  ✅ Battle #{bnum} dibuat!")
+                log.info(f"  📌 Topic: {topic}")
+                log.info(f"  🆚 Lawan: {opp_name}")
+                _hooks.emit("on_created", battle_id=battle_id, battle_num=bnum, topic=topic,
+                            opponent=opp_name, battle=battle_raw)
+                root.set("battle.id", battle_id)
+                root.set("battle.number", str(bnum))
+
+                outcome = play_battle(battle_id, bnum, opp_name)
+                root.set("battle.outcome", outcome or "interrupted")
+                if outcome is None:
+                    # Dihentikan di tengah battle — state tersimpan, tidak dihitung
+                    stats["total"] -= 1
+                    log.info(f"  💾 Battle #{bnum} disimpan → dilanjutkan saat bot start lagi")
+                    break
+                _record(bnum, opp_name, outcome)
 
         if max_b > 0 and count >= max_b:
             log.info(f"\n✅ Target {max_b} battles tercapai.")
             break
 
-        countdown(DELAY_SEC)
+        if countdown(CFG.delay_sec):
+            break
 
+    if _keeper:
+        _keeper.stop()
+    _watcher.stop()
+    profiler.stop()
+    if _lease:
+        _lease.release()
+    _hooks.stop(HOOK_DRAIN)
+    if _history:
+        _history.close()
+    if _archive:
+        _archive.close()
+    _agents.save()
+    if recorder:
+        recorder.close()
+    if replayer:
+        log.info(f"  📼 Replay selesai: {replayer.served} dijawab, {replayer.missed} tidak ada di cassette")
     print_summary()
 
 
@@ -615,7 +1091,23 @@ if __name__ == "__main__":
     p = argparse.ArgumentParser(description="MoltArena Auto Battle Bot v10")
     p.add_argument("--once",  action="store_true", help="1 battle saja (test)")
     p.add_argument("--debug", action="store_true", help="Log HTTP detail")
+    p.add_argument("--profile", action="store_true",
+                   help="cProfile + tracemalloc, laporan ke profiles/ tiap MOLT_PROFILE_EVERY battle")
+    g = p.add_mutually_exclusive_group()
+    g.add_argument("--record", metavar="FILE", help="Rekam traffic HTTP ke cassette (.jsonl.gz)")
+    g.add_argument("--replay", metavar="FILE", help="Jalankan ulang dari cassette tanpa network")
+    g.add_argument("--backfill", action="store_true", help="Isi history dari riwayat battle di API lalu keluar")
+    g.add_argument("--doctor", action="store_true",
+                   help="Ukur latency DNS/TCP/TLS/TTFB endpoint + cek API key & cookie, lalu keluar")
+    p.add_argument("--samples", type=int, default=DOCTOR_SAMPLES, help="--doctor: sampel per endpoint")
+    p.add_argument("--json", action="store_true", help="--doctor: laporan sebagai JSON")
     args = p.parse_args()
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
-    main(max_override=1 if args.once else None)
+    if args.backfill:
+        run_backfill()
+        sys.exit(0)
+    if args.doctor:
+        sys.exit(run_doctor(args.samples, args.json))
+    main(max_override=1 if args.once else None, profile=args.profile,
+         record=args.record, replay=args.replay)
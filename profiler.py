@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+profiler.py — Profiling & Memory-Leak Watch untuk MoltArena Bot
+================================================================
+Untuk bot yang jalan berminggu-minggu (MOLT_MAX_BATTLES=0).
+
+Mode --profile:
+  1. cProfile aktif di thread utama → setiap N battle ditulis
+     profiles/cprofile_<waktu>_b<N>.prof (+ ringkasan .txt top fungsi)
+  2. tracemalloc aktif → setiap N battle ditulis snapshot top alokasi
+     + selisih terhadap snapshot sebelumnya (yang terus naik = kandidat leak)
+
+Selalu aktif (Linux/macOS):
+  kill -USR1 <pid>  → dump stack semua thread + RSS / gc / tracemalloc
+                      ke profiles/dump_<waktu>.txt tanpa menghentikan bot
+"""
+
+import io, os, sys, gc, signal, logging, pstats, cProfile, threading, traceback, tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+log = logging.getLogger("Profiler")
+
+TOP_N          = 25   # baris top alokasi / fungsi per laporan
+TRACE_FRAMES   = 10   # kedalaman traceback tracemalloc
+
+
+def rss_mb() -> float:
+    """RSS saat ini (MB). /proc di Linux, fallback ru_maxrss (peak)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return 0.0
+
+
+class Profiler:
+    def __init__(self, out_dir: str | Path, every: int = 10, enabled: bool = False):
+        self.out_dir   = Path(out_dir)
+        self.every     = max(1, every)
+        self.enabled   = enabled
+        self._prof     = None
+        self._snapshot = None
+        self._battles  = 0
+        self._reported = 0
+        self._lock     = threading.Lock()
+
+    # ── PUBLIC ────────────────────────────────────────────────
+
+    def start(self):
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._on_sigusr1)
+        if not self.enabled:
+            return
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        tracemalloc.start(TRACE_FRAMES)
+        self._snapshot = tracemalloc.take_snapshot()
+        self._prof = cProfile.Profile()
+        self._prof.enable()
+        log.info(f"  🔬 Profiling aktif → {self.out_dir} (setiap {self.every} battle)")
+
+    def battle_done(self):
+        """Dipanggil setelah setiap battle tercatat."""
+        if not self.enabled:
+            return
+        self._battles += 1
+        if self._battles % self.every == 0:
+            self.write_report()
+
+    def write_report(self):
+        """Tulis cProfile window ini + snapshot tracemalloc, lalu mulai window baru."""
+        if not self._prof:
+            return
+        with self._lock:
+            tag = f"{datetime.now():%Y%m%d_%H%M%S}_b{self._battles}"
+            self._reported = self._battles
+            self._prof.disable()
+            try:
+                self.out_dir.mkdir(parents=True, exist_ok=True)
+                prof_path = self.out_dir / f"cprofile_{tag}.prof"
+                self._prof.dump_stats(prof_path)
+                buf = io.StringIO()
+                pstats.Stats(self._prof, stream=buf).sort_stats("cumulative").print_stats(TOP_N)
+                prof_path.with_suffix(".txt").write_text(buf.getvalue(), encoding="utf-8")
+
+                snap = tracemalloc.take_snapshot()
+                lines = [f"# tracemalloc @ {datetime.now().isoformat()} — "
+                         f"battle {self._battles}, RSS {rss_mb():.1f} MB",
+                         "", f"## Top {TOP_N} alokasi (per baris)"]
+                lines += [str(st) for st in snap.statistics("lineno")[:TOP_N]]
+                if self._snapshot:
+                    lines += ["", f"## Top {TOP_N} pertumbuhan sejak laporan sebelumnya"]
+                    lines += [str(st) for st in snap.compare_to(self._snapshot, "lineno")[:TOP_N]]
+                self._snapshot = snap
+                (self.out_dir / f"memory_{tag}.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+                log.info(f"  🔬 Profil ditulis: {prof_path.name} | RSS {rss_mb():.1f} MB")
+            except Exception as e:
+                log.error(f"  ❌ Gagal tulis profil: {e}")
+            finally:
+                self._prof = cProfile.Profile()
+                self._prof.enable()
+
+    def stop(self):
+        if self._prof:
+            if self._battles > self._reported:
+                self.write_report()
+            self._prof.disable()
+            self._prof = None
+
+    def dump_now(self) -> Path | None:
+        """Dump stack semua thread + ringkasan memori ke file."""
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            path  = self.out_dir / f"dump_{datetime.now():%Y%m%d_%H%M%S}.txt"
+            names = {t.ident: t.name for t in threading.enumerate()}
+            lines = [f"# Dump @ {datetime.now().isoformat()} — pid {os.getpid()}",
+                     f"RSS      : {rss_mb():.1f} MB",
+                     f"gc count : {gc.get_count()} | objects: {len(gc.get_objects())}",
+                     f"threads  : {threading.active_count()}", ""]
+            for ident, frame in sys._current_frames().items():
+                lines.append(f"## Thread {names.get(ident, '?')} ({ident})")
+                lines += [l.rstrip() for l in traceback.format_stack(frame)]
+                lines.append("")
+            if tracemalloc.is_tracing():
+                cur, peak = tracemalloc.get_traced_memory()
+                lines.append(f"## tracemalloc: current {cur/1e6:.1f} MB, peak {peak/1e6:.1f} MB")
+                lines += [str(st) for st in tracemalloc.take_snapshot().statistics("lineno")[:TOP_N]]
+            else:
+                lines.append("## tracemalloc nonaktif (jalankan dengan --profile untuk detail alokasi)")
+            path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            return path
+        except Exception as e:
+            log.error(f"  ❌ Gagal dump: {e}")
+            return None
+
+    # ── PRIVATE ───────────────────────────────────────────────
+
+    def _on_sigusr1(self, sig, frame):
+        path = self.dump_now()
+        if path:
+            log.info(f"  🔬 SIGUSR1 → dump ditulis ke {path}")
@@ -443,6 +443,7 @@ PYEOF
 
     if echo "$PARSED" | grep -q "sb-hkxnuxudaopdpmlcfqjf-auth-token"; then
         success "Cookie diperbarui! Token Supabase ditemukan ✓"
+        info "Bot yang sedang berjalan memakai cookie baru di battle berikutnya (tanpa restart)"
     else
         warn "Cookie disimpan tapi token sb-auth-token tidak ditemukan"
     fi
@@ -530,6 +531,9 @@ ExecStart=${VENV_DIR}/bin/python ${MAIN_SCRIPT}
 Restart=always
 RestartSec=60
 EnvironmentFile=${ENV_FILE}
+KillSignal=SIGTERM
+KillMode=mixed
+TimeoutStopSec=60
 
 [Install]
 WantedBy=multi-user.target
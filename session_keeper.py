@@ -6,16 +6,19 @@ MoltArena pakai Supabase auth. Token expire setiap 1 JAM.
 Modul ini handle refresh otomatis tanpa blockchain/wallet.
 
 Cara kerja:
-  1. Parse refresh_token dari cookie sb-hkxnuxudaopdpmlcfqjf-auth-token
+  1. Cookie di-parse sekali ke SessionJar: session Supabase dari
+     sb-hkxnuxudaopdpmlcfqjf-auth-token(.0/.1) + cookie GA
   2. Auto-discover Supabase anon key dari halaman MoltArena
   3. Setiap 45 menit: POST ke Supabase refresh endpoint
-  4. Dapat access_token baru → rebuild cookie → simpan ke .env
+  4. Dapat access_token baru → SessionJar.set_session → simpan ke .env
   5. Vote tetap berjalan tanpa 401
 """
 
 import os, re, sys, json, time, base64, logging, threading, requests
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import unquote
+from requests.auth import AuthBase
 
 log = logging.getLogger("SessionKeeper")
 
@@ -32,26 +35,161 @@ MAX_COOKIE_CHUNK = 3000       # karakter per bagian cookie (.0 / .1)
 
 SKIP_ATTR = {"path", "domain", "expires", "max-age", "samesite",
              "httponly", "secure", "priority", "version"}
+AUTH_COOKIE = f"sb-{SUPABASE_PROJECT}-auth-token"
+
+
+def parse_cookie_str(cookie_str: str) -> dict:
+    """'a=1; b=2' (atau baris Set-Cookie) → {nama: nilai}, atribut cookie dibuang."""
+    result = {}
+    for part in cookie_str.split(";"):
+        part = part.strip()
+        if not part or "=" not in part:
+            continue
+        k, v = part.split("=", 1)
+        k = k.strip()
+        if k.lower() not in SKIP_ATTR:
+            result[k] = v.strip()
+    return result
+
+
+def _decode_session(value: str) -> dict:
+    """Nilai cookie auth Supabase ("base64-<base64/base64url JSON>" atau JSON) → dict."""
+    if not value:
+        return {}
+    try:
+        if value.startswith("base64-"):
+            raw = value.removeprefix("base64-")
+            # altchars -_ → base64url & base64 standar sama-sama terbaca; padding (4 - n % 4) % 4
+            raw = base64.b64decode(raw + "=" * ((4 - len(raw) % 4) % 4), altchars=b"-_")
+            return json.loads(raw.decode("utf-8"))
+        return json.loads(unquote(value))
+    except (ValueError, UnicodeDecodeError) as e:
+        log.debug(f"  Decode session Supabase gagal: {e} (len={len(value)})")
+        return {}
+
+
+class SessionJar(AuthBase):
+    """
+    Cookie MoltArena yang sudah di-parse: session Supabase (token, expiry,
+    jumlah potongan .0/.1) + cookie lain (GA). Header `cookie` diserialisasi
+    sekali setiap isi berubah dan dipasang ke request lewat `auth=jar`
+    (Session yang sama, pool koneksi tetap dipakai bersama).
+    """
+
+    def __init__(self, cookie_str: str = ""):
+        self._lock    = threading.Lock()
+        self._cookies = None    # nama → nilai, urutan dipertahankan
+        self.session  = {}      # JSON session Supabase (access_token, refresh_token, expires_at, …)
+        self.chunks   = 0       # jumlah potongan cookie auth (0 = tidak ada)
+        self.header   = ""
+        self._source  = None    # string terakhir yang di-load → load() ulang tanpa parse
+        self.load(cookie_str)
+
+    # ── PUBLIC ────────────────────────────────────────────────
+
+    @property
+    def refresh_token(self) -> str:
+        return self.session.get("refresh_token", "")
+
+    @property
+    def access_token(self) -> str:
+        return self.session.get("access_token", "")
+
+    @property
+    def expires_at(self) -> float | None:
+        """Unix timestamp access token habis (dari session, tanpa request)."""
+        exp = self.session.get("expires_at")
+        return float(exp) if isinstance(exp, (int, float)) else None
+
+    @property
+    def ga(self) -> dict:
+        return {k: v for k, v in (self._cookies or {}).items() if k.startswith("_ga")}
+
+    def load(self, cookie_str: str) -> bool:
+        """Ganti seluruh isi dari string cookie. Return True jika berubah."""
+        cookie_str = (cookie_str or "").strip()
+        if cookie_str in (self._source, self.header) and self._cookies is not None:
+            return False
+        self._source = cookie_str
+        return self._set(parse_cookie_str(cookie_str))
+
+    def merge(self, cookies: dict) -> bool:
+        """Timpa sebagian cookie (mis. dari Set-Cookie). Return True jika berubah."""
+        return self._set({**(self._cookies or {}), **cookies})
+
+    def set_session(self, token_data: dict) -> bool:
+        """Session baru dari Supabase → cookie auth di-encode & dipotong ulang (+ cookie GA)."""
+        data = {"refresh_token": self.refresh_token, **token_data} if self.refresh_token else token_data
+        try:
+            encoded = "base64-" + base64.b64encode(
+                json.dumps(data, separators=(",", ":")).encode()
+            ).decode().rstrip("=")
+        except (TypeError, ValueError) as e:
+            log.error(f"  ❌ Encode session error: {e}")
+            return False
+        cookies = self.ga
+        for i in range(0, len(encoded), MAX_COOKIE_CHUNK):
+            cookies[f"{AUTH_COOKIE}.{i // MAX_COOKIE_CHUNK}"] = encoded[i:i + MAX_COOKIE_CHUNK]
+        return self._set(cookies)
+
+    def __call__(self, r):
+        if self.header:
+            r.headers["cookie"] = self.header
+        return r
+
+    def __bool__(self) -> bool:
+        return bool(self.header)
+
+    def __str__(self) -> str:
+        return self.header
+
+    # ── PRIVATE ───────────────────────────────────────────────
+
+    def _set(self, cookies: dict) -> bool:
+        with self._lock:
+            if cookies == self._cookies:
+                return False
+            if AUTH_COOKIE in cookies:   # cookie kecil → tidak dipotong
+                value, chunks = cookies[AUTH_COOKIE], 1
+            else:
+                parts = []
+                while f"{AUTH_COOKIE}.{len(parts)}" in cookies:
+                    parts.append(cookies[f"{AUTH_COOKIE}.{len(parts)}"])
+                value, chunks = "".join(parts), len(parts)
+            # Session hanya di-decode ulang jika cookie auth berubah
+            if chunks != self.chunks or value != self._auth_value():
+                self.session = _decode_session(value)
+                if value and not self.refresh_token:
+                    log.debug("  refresh_token tidak ada di session Supabase")
+            self._cookies = dict(cookies)
+            self.chunks   = chunks
+            self.header   = "; ".join(f"{k}={v}" for k, v in cookies.items())
+            return True
+
+    def _auth_value(self) -> str:
+        c = self._cookies or {}
+        if AUTH_COOKIE in c:
+            return c[AUTH_COOKIE]
+        return "".join(c[f"{AUTH_COOKIE}.{i}"] for i in range(self.chunks))
 
 
 class SessionKeeper:
-    def __init__(self, cookie_str: str, env_path: str | Path = ".env"):
-        self._cookie      = cookie_str.strip()
+    def __init__(self, cookie_str: str, env_path: str | Path = ".env",
+                 session: requests.Session | None = None):
+        self.jar          = SessionJar(cookie_str)
         self._env_path    = Path(env_path)
-        self._lock        = threading.Lock()
+        self._http        = session or requests
         self._thread      = None
         self._running     = False
+        self._wake        = threading.Event()
         self._last_ok     = None
         self._fail_cnt    = 0
         self._anon_key    = ""
-        self._refresh_tok = ""
-        self._ga_cookies  = {}
-        self._parse_tokens()
 
     # ── PUBLIC ────────────────────────────────────────────────
 
     def start(self):
-        if not self._cookie:
+        if not self.jar:
             log.warning("  ⚠️  SESSION_COOKIE kosong — auto-refresh tidak aktif")
             return
 
@@ -71,7 +209,7 @@ class SessionKeeper:
         if not self._anon_key:
             self._discover_anon_key()
 
-        if self._refresh_tok:
+        if self.jar.refresh_token:
             log.info(f"  🔑 Refresh token OK → auto-refresh setiap {REFRESH_INTERVAL//60} menit")
         else:
             log.warning("  ⚠️  Refresh token tidak ditemukan, pakai session ping saja")
@@ -82,10 +220,17 @@ class SessionKeeper:
 
     def stop(self):
         self._running = False
+        self._wake.set()
 
     def get_cookie(self) -> str:
-        with self._lock:
-            return self._cookie
+        return self.jar.header
+
+    def update_cookie(self, cookie_str: str):
+        """Cookie baru dari luar (mis. .env diedit via run.sh) — parse ulang token."""
+        if not self.jar.load(cookie_str):
+            return
+        self._fail_cnt = 0
+        log.info("  🔄 Cookie baru dari .env dipakai — tanpa restart")
 
     def handle_401(self) -> bool:
         """Dipanggil saat vote 401 — refresh segera."""
@@ -103,23 +248,23 @@ class SessionKeeper:
 
     @property
     def status(self) -> str:
-        if not self._cookie:
+        if not self.jar:
             return "❌ Tidak ada cookie"
+        exp = self.jar.expires_at
+        exp = f", token s/d {datetime.fromtimestamp(exp):%H:%M}" if exp else ""
         if self._last_ok:
             mins = int((datetime.now() - self._last_ok).total_seconds() / 60)
-            return f"✅ Aktif (refresh {mins} menit lalu)"
-        return "⏳ Belum pernah refresh"
+            return f"✅ Aktif (refresh {mins} menit lalu{exp})"
+        return f"⏳ Belum pernah refresh{exp}"
 
     # ── PRIVATE LOOP ──────────────────────────────────────────
 
     def _loop(self):
-        sleep_left = REFRESH_INTERVAL
+        # wait() langsung bangun saat stop() dipanggil
         while self._running:
-            time.sleep(1)
-            sleep_left -= 1
-            if sleep_left <= 0:
-                self._do_refresh()
-                sleep_left = REFRESH_INTERVAL
+            if self._wake.wait(REFRESH_INTERVAL):
+                break
+            self._do_refresh()
 
     # ── PRIVATE REFRESH ───────────────────────────────────────
 
@@ -129,7 +274,7 @@ class SessionKeeper:
             self._discover_anon_key()
 
         # Prioritas 1: Supabase token refresh
-        if self._refresh_tok and self._anon_key:
+        if self.jar.refresh_token and self._anon_key:
             if self._supabase_refresh():
                 return True
 
@@ -138,13 +283,13 @@ class SessionKeeper:
 
     def _supabase_refresh(self) -> bool:
         try:
-            r = requests.post(
+            r = self._http.post(
                 f"{SUPABASE_URL}/auth/v1/token?grant_type=refresh_token",
                 headers={
                     "Content-Type": "application/json",
                     "apikey":       self._anon_key,
                 },
-                json={"refresh_token": self._refresh_tok},
+                json={"refresh_token": self.jar.refresh_token},
                 timeout=15,
             )
             log.debug(f"  [supabase refresh] → {r.status_code}")
@@ -153,18 +298,10 @@ class SessionKeeper:
                 return False
 
             data = r.json()
-            new_access  = data.get("access_token", "")
-            new_refresh = data.get("refresh_token", "")
-            if not new_access:
+            if not data.get("access_token"):
                 return False
-            if new_refresh:
-                self._refresh_tok = new_refresh
-
-            new_cookie = self._rebuild_supabase_cookie(data)
-            if new_cookie:
-                with self._lock:
-                    self._cookie = new_cookie
-                self._save_to_env(new_cookie)
+            if self.jar.set_session(data):
+                self._save_to_env(self.jar.header)
                 self._last_ok  = datetime.now()
                 self._fail_cnt = 0
                 log.info(f"  🔄 Token Supabase diperbarui! ({datetime.now().strftime('%H:%M:%S')}) +1 jam")
@@ -175,7 +312,7 @@ class SessionKeeper:
 
     def _session_ping(self) -> bool:
         try:
-            r = requests.get(
+            r = self._http.get(
                 AUTH_SESSION,
                 headers={
                     "Accept":          "application/json",
@@ -184,8 +321,8 @@ class SessionKeeper:
                     "Referer":         BASE_URL + "/",
                     "User-Agent":      "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                                        "AppleWebKit/537.36 Chrome/145.0.0.0 Safari/537.36",
-                    "cookie":          self.get_cookie(),
                 },
+                auth=self.jar,
                 timeout=15,
             )
             log.debug(f"  [session ping] → {r.status_code}")
@@ -207,19 +344,9 @@ class SessionKeeper:
                 sc = r.headers.get("Set-Cookie", "")
                 raw_sc = [sc] if sc else []
             for sc_line in raw_sc:
-                name_val = sc_line.split(";")[0].strip()
-                if "=" in name_val:
-                    k, v = name_val.split("=", 1)
-                    k = k.strip()
-                    if k.lower() not in SKIP_ATTR:
-                        new_cookies[k] = v.strip()
-            if new_cookies:
-                existing = self._parse_cookie_str(self.get_cookie())
-                existing.update(new_cookies)
-                new_str = "; ".join(f"{k}={v}" for k, v in existing.items())
-                with self._lock:
-                    self._cookie = new_str
-                self._save_to_env(new_str)
+                new_cookies.update(parse_cookie_str(sc_line.split(";")[0]))
+            if new_cookies and self.jar.merge(new_cookies):
+                self._save_to_env(self.jar.header)
                 log.info(f"  🔄 Cookie diperbarui via session ping ({datetime.now().strftime('%H:%M:%S')})")
 
             self._last_ok  = datetime.now()
@@ -232,46 +359,6 @@ class SessionKeeper:
 
     # ── PRIVATE SUPABASE HELPERS ──────────────────────────────
 
-    def _parse_tokens(self):
-        """Ekstrak refresh_token dari cookie sb-auth-token."""
-        cookies = self._parse_cookie_str(self._cookie)
-        self._ga_cookies = {k: v for k, v in cookies.items() if k.startswith("_ga")}
-
-        tok0 = cookies.get(f"sb-{SUPABASE_PROJECT}-auth-token.0", "")
-        tok1 = cookies.get(f"sb-{SUPABASE_PROJECT}-auth-token.1", "")
-
-        if not tok0:
-            log.debug("  sb-auth-token.0 tidak ditemukan di cookie")
-            return
-
-        log.debug(f"  tok0 len={len(tok0)}, tok1 len={len(tok1)}")
-
-        raw = (tok0 + tok1).removeprefix("base64-")
-        log.debug(f"  raw base64 len={len(raw)}, mod4={len(raw) % 4}")
-
-        try:
-            # Fix: (4 - n % 4) % 4 agar tidak tambah 4 '=' saat n % 4 == 0
-            padding_needed = (4 - len(raw) % 4) % 4
-            padded = raw + "=" * padding_needed
-
-            # Coba decode normal dulu
-            try:
-                decoded = base64.b64decode(padded).decode("utf-8")
-            except Exception:
-                # Fallback: ignore invalid chars (toleran terhadap data korup)
-                decoded = base64.b64decode(padded + "==", validate=False).decode("utf-8", errors="ignore")
-
-            data = json.loads(decoded)
-            self._refresh_tok = data.get("refresh_token", "")
-            if self._refresh_tok:
-                log.debug(f"  Refresh token: {self._refresh_tok[:8]}...")
-            else:
-                log.debug("  refresh_token key tidak ada di decoded JSON")
-        except json.JSONDecodeError as e:
-            log.debug(f"  JSON decode error: {e} (raw len={len(raw)})")
-        except Exception as e:
-            log.debug(f"  Parse token error: {e}")
-
     def _discover_anon_key(self):
         """Ambil Supabase anon key — pakai fallback hardcoded, coba discover dari halaman."""
         if self._anon_key:
@@ -283,7 +370,7 @@ class SessionKeeper:
 
         # Coba discover dari halaman untuk update jika key berubah di masa depan
         try:
-            r = requests.get(BASE_URL, timeout=10,
+            r = self._http.get(BASE_URL, timeout=10,
                              headers={"User-Agent": "Mozilla/5.0 Chrome/145"})
             # Format baru: sb_publishable_XXXX
             m = re.search(r'sb_publishable_[A-Za-z0-9_\-]+', r.text)
@@ -307,38 +394,19 @@ class SessionKeeper:
         except Exception as e:
             log.debug(f"  Discover anon key error: {e}")
 
-    def _rebuild_supabase_cookie(self, token_data: dict) -> str:
-        """Encode token_data sebagai base64-JSON, split ke .0/.1, gabung dengan GA cookies."""
-        try:
-            encoded = "base64-" + base64.b64encode(
-                json.dumps(token_data, separators=(",", ":")).encode()
-            ).decode().rstrip("=")
-
-            tok0 = encoded[:MAX_COOKIE_CHUNK]
-            tok1 = encoded[MAX_COOKIE_CHUNK:]
-
-            parts = [f"{k}={v}" for k, v in self._ga_cookies.items()]
-            parts.append(f"sb-{SUPABASE_PROJECT}-auth-token.0={tok0}")
-            if tok1:
-                parts.append(f"sb-{SUPABASE_PROJECT}-auth-token.1={tok1}")
-            return "; ".join(parts)
-        except Exception as e:
-            log.error(f"  ❌ Rebuild cookie error: {e}")
-            return ""
-
     # ── PRIVATE HELPERS ───────────────────────────────────────
 
     def _check_session(self) -> tuple[bool, str]:
         try:
-            r = requests.get(
+            r = self._http.get(
                 AUTH_SESSION,
                 headers={
-                    "cookie":     self.get_cookie(),
                     "Accept":     "application/json",
                     "User-Agent": "Mozilla/5.0 Chrome/145",
                     "Origin":     BASE_URL,
                     "Referer":    BASE_URL + "/",
                 },
+                auth=self.jar,
                 timeout=10,
             )
             if r.status_code == 200:
@@ -350,18 +418,6 @@ class SessionKeeper:
         except Exception:
             return False, ""
 
-    def _parse_cookie_str(self, cookie_str: str) -> dict:
-        result = {}
-        for part in cookie_str.split(";"):
-            part = part.strip()
-            if not part or "=" not in part:
-                continue
-            k, v = part.split("=", 1)
-            k = k.strip()
-            if k.lower() not in SKIP_ATTR:
-                result[k] = v.strip()
-        return result
-
     def _save_to_env(self, cookie_str: str):
         try:
             if self._env_path.exists():
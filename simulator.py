@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+simulator.py — Simulasi throughput MoltArena Bot (discrete-event)
+==================================================================
+Meniru siklus main() per host tanpa network:
+
+  create → run (retry 10s/20s seperti step2_run) → poll tiap 15s
+  (max 300s) → vote → tunggu votingEndsAt → poll final tiap 15s
+  (max 480s) → cooldown MOLT_DELAY_SECONDS
+
+Distribusi waktu diambil dari history (molt_history.db, battle "live"):
+satu baris battle di-resample utuh (bootstrap) agar korelasi antar fase
+tetap terjaga. Waktu generate ronde diskalakan ke MOLT_ROUNDS kandidat.
+History kosong → pakai estimasi default.
+
+Batas server yang bisa dimodelkan:
+  --rate-limit N    request/menit per API key (create kena 429 → tunggu 5 menit)
+  --server-slots N  battle aktif bersamaan per akun (create ditolak → tunggu 2 menit)
+
+  python3 simulator.py                                   # config .env sekarang
+  python3 simulator.py --delay 300,600 --rounds 3,5 --hosts 1,2,4
+  python3 simulator.py --hours 72 --rate-limit 30 --json
+"""
+
+import sys, json, heapq, random, argparse, itertools
+from collections import Counter, deque
+from pathlib import Path
+
+from config import Config
+from history import History
+from analytics import DEFAULT_DB
+
+ENV_PATH     = Path(__file__).parent / ".env"
+POLL_TICK    = 15      # step3_poll & step5_wait_final
+POLL_MAX     = 300
+FINAL_MAX    = 480
+RUN_BACKOFF  = (10, 20)
+WAIT_429     = 300
+WAIT_BUSY    = 120
+
+# Estimasi jika history belum ada (detik)
+DEFAULT_ROW = {"rounds": 5, "run_attempts": 1, "t_create": 1.0, "t_run": 2.0,
+               "t_poll": 200.0, "t_voting": 340.0, "t_final": 15.0}
+
+
+class Timings:
+    """Sampel waktu fase dari history (bootstrap per baris battle)."""
+
+    FIELDS = ("rounds", "run_attempts", "t_create", "t_run", "t_poll", "t_voting", "t_final")
+
+    def __init__(self, rows: list[dict]):
+        self.rows   = rows or [DEFAULT_ROW]
+        self.fitted = bool(rows)
+
+    @classmethod
+    def fit(cls, db_path: str | Path = DEFAULT_DB) -> "Timings":
+        if not Path(db_path).exists():
+            return cls([])
+        h = History(db_path)
+        try:
+            raw = h.rows(cls.FIELDS, "WHERE source = 'live' AND t_poll IS NOT NULL")
+        finally:
+            h.close()
+        return cls([dict(zip(cls.FIELDS, r)) for r in raw])
+
+    def sample(self, rnd: random.Random, rounds: int) -> dict:
+        row = rnd.choice(self.rows)
+        s   = {k: (row[k] if row[k] is not None else DEFAULT_ROW[k]) for k in self.FIELDS}
+        s["voting"] = row["t_voting"] is not None   # None → selesai tanpa fase voting
+        # Waktu generate per ronde → skalakan ke rounds kandidat (5s = sleep awal poll)
+        per_round   = max(0.0, s["t_poll"] - 5) / max(1, s["rounds"] or 1)
+        s["t_poll"] = 5 + per_round * rounds
+        return s
+
+
+class Simulator:
+    def __init__(self, timings: Timings, delay_sec: int, rounds: int, hosts: int = 1,
+                 auto_vote: bool = True, rate_limit: int = 0, server_slots: int = 0, seed: int = 0):
+        self.timings      = timings
+        self.delay_sec    = delay_sec
+        self.rounds       = rounds
+        self.hosts        = max(1, hosts)
+        self.auto_vote    = auto_vote
+        self.rate_limit   = rate_limit
+        self.server_slots = server_slots
+        self.rnd          = random.Random(seed)
+
+    def run(self, hours: float = 24) -> dict:
+        self.now      = 0.0
+        self.active   = 0
+        self.requests = Counter()
+        self.events   = Counter()
+        self.cycles   = []
+        self._window  = deque()   # timestamp request 60 detik terakhir
+        self._peak    = 0
+        end  = hours * 3600
+        heap = []
+        for i in range(self.hosts):
+            proc = self._host()
+            # Host start tersebar merata dalam satu delay
+            heapq.heappush(heap, (i * self.delay_sec / self.hosts, i, proc))
+        seq = self.hosts
+        while heap:
+            t, _, proc = heapq.heappop(heap)
+            if t > end:
+                break
+            self.now = t
+            wait = next(proc)
+            seq += 1
+            heapq.heappush(heap, (t + wait, seq, proc))
+        return self._summary(hours)
+
+    # ── Satu host = generator yang yield lama tunggu ──────────
+
+    def _host(self):
+        while True:
+            s  = self.timings.sample(self.rnd, self.rounds)
+            t0 = self.now
+            yield s["t_create"]
+            if not self._request("create"):
+                self.events["rate_limited"] += 1
+                yield WAIT_429
+                continue
+            if self.server_slots and self.active >= self.server_slots:
+                self.events["busy"] += 1
+                yield WAIT_BUSY
+                continue
+            self.active += 1
+            try:
+                yield from self._battle(s)
+            finally:
+                self.active -= 1
+            self.cycles.append(self.now - t0 + self.delay_sec)
+            yield self.delay_sec
+
+    def _battle(self, s: dict):
+        # Step 2 — /run dengan retry
+        attempts = min(3, max(1, int(s["run_attempts"])))
+        for a in range(attempts):
+            self._request("run")
+            if a < attempts - 1:
+                yield RUN_BACKOFF[min(a, len(RUN_BACKOFF) - 1)]
+        yield max(0.0, s["t_run"] - sum(RUN_BACKOFF[:attempts - 1]))
+
+        # Step 3 — poll tiap 15s sampai selesai generate / timeout
+        yield 5
+        ready, elapsed = s["t_poll"] - 5, 0
+        while elapsed < POLL_MAX:
+            yield POLL_TICK
+            elapsed += POLL_TICK
+            self._request("poll")
+            if elapsed >= ready:
+                break
+        else:
+            self.events["poll_timeout"] += 1
+            return
+        if self.auto_vote:
+            self._request("vote")
+        if not s["voting"]:
+            self.events["battles"] += 1
+            return
+
+        # Step 5 — fetch fresh, tunggu voting, poll final
+        self._request("final")
+        yield s["t_voting"]
+        elapsed = 0
+        while True:
+            self._request("final")
+            if elapsed >= s["t_final"] or elapsed >= FINAL_MAX:
+                break
+            yield POLL_TICK
+            elapsed += POLL_TICK
+        if elapsed >= FINAL_MAX:
+            self._request("final")
+            self.events["final_timeout"] += 1
+        self.events["battles"] += 1
+
+    def _request(self, endpoint: str) -> bool:
+        """Catat request; False jika melewati rate limit (request/menit)."""
+        w = self._window
+        while w and w[0] <= self.now - 60:
+            w.popleft()
+        self.requests[endpoint] += 1
+        if self.rate_limit and len(w) >= self.rate_limit:
+            self.events["throttled"] += 1
+            return False
+        w.append(self.now)
+        self._peak = max(self._peak, len(w))
+        return True
+
+    def _summary(self, hours: float) -> dict:
+        total  = sum(self.requests.values())
+        cycles = sorted(self.cycles)
+        return {
+            "delay_sec":        self.delay_sec,
+            "rounds":           self.rounds,
+            "hosts":            self.hosts,
+            "battles":          self.events["battles"],
+            "battles_per_hour": round(self.events["battles"] / hours, 2),
+            "per_host_hour":    round(self.events["battles"] / hours / self.hosts, 2),
+            "requests":         total,
+            "requests_per_hour": round(total / hours, 1),
+            "requests_by_endpoint": dict(self.requests),
+            "peak_req_per_min": self._peak,
+            "cycle_sec_p50":    round(cycles[len(cycles) // 2], 1) if cycles else None,
+            "poll_timeout":     self.events["poll_timeout"],
+            "final_timeout":    self.events["final_timeout"],
+            "rate_limited":     self.events["rate_limited"],
+            "throttled":        self.events["throttled"],
+            "busy":             self.events["busy"],
+        }
+
+
+def _ints(text: str) -> list[int]:
+    return [int(x) for x in str(text).split(",") if x.strip()]
+
+
+if __name__ == "__main__":
+    cfg, _ = Config.load(ENV_PATH)
+    p = argparse.ArgumentParser(description="Simulasi throughput MoltArena Bot")
+    p.add_argument("--db",           default=DEFAULT_DB, help="Path molt_history.db (sumber distribusi waktu)")
+    p.add_argument("--delay",        default=str(cfg.delay_sec), help="MOLT_DELAY_SECONDS kandidat, pisah koma")
+    p.add_argument("--rounds",       default=str(cfg.rounds),    help="MOLT_ROUNDS kandidat, pisah koma")
+    p.add_argument("--hosts",        default="1", help="Jumlah host/bot paralel, pisah koma")
+    p.add_argument("--hours",        type=float, default=24, help="Durasi simulasi (jam)")
+    p.add_argument("--rate-limit",   type=int, default=0, help="Batas request/menit per API key (0 = tanpa batas)")
+    p.add_argument("--server-slots", type=int, default=0, help="Battle aktif bersamaan per akun (0 = tanpa batas)")
+    p.add_argument("--no-vote",      action="store_true", help="Simulasikan MOLT_AUTO_VOTE=false")
+    p.add_argument("--seed",         type=int, default=0)
+    p.add_argument("--json",         action="store_true", help="Output JSON")
+    args = p.parse_args()
+
+    timings = Timings.fit(args.db)
+    results = []
+    for delay, rounds, hosts in itertools.product(_ints(args.delay), _ints(args.rounds), _ints(args.hosts)):
+        sim = Simulator(timings, delay, rounds, hosts, auto_vote=cfg.auto_vote and not args.no_vote,
+                        rate_limit=args.rate_limit, server_slots=args.server_slots, seed=args.seed)
+        results.append(sim.run(args.hours))
+
+    if args.json:
+        print(json.dumps({"fitted_battles": len(timings.rows) if timings.fitted else 0,
+                          "hours": args.hours, "scenarios": results}, indent=2))
+        sys.exit(0)
+
+    src = f"{len(timings.rows)} battle dari history" if timings.fitted else "estimasi default (history kosong)"
+    print(f"\n🧮 Simulasi {args.hours:g} jam — distribusi waktu: {src}\n")
+    print(f"   {'delay':>6} {'rounds':>6} {'hosts':>5} │ {'battle/jam':>10} {'/host':>6} "
+          f"{'req/jam':>8} {'peak/mnt':>8} {'siklus p50':>10} │ {'timeout':>7} {'429':>5} {'busy':>5}")
+    for r in results:
+        cyc = f"{r['cycle_sec_p50']/60:.1f}m" if r["cycle_sec_p50"] else "-"
+        print(f"   {r['delay_sec']:>6} {r['rounds']:>6} {r['hosts']:>5} │ {r['battles_per_hour']:>10.2f} "
+              f"{r['per_host_hour']:>6.2f} {r['requests_per_hour']:>8.1f} {r['peak_req_per_min']:>8} "
+              f"{cyc:>10} │ {r['poll_timeout'] + r['final_timeout']:>7} {r['rate_limited']:>5} {r['busy']:>5}")
+    print()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+tracing.py — Trace per battle untuk MoltArena Bot
+==================================================
+Span ringan tanpa dependency OpenTelemetry. Setiap battle = 1 trace,
+diekspor sebagai 1 baris JSON format OTLP (ExportTraceServiceRequest)
+ke file lokal → bisa di-load ke Jaeger / Tempo / otel-desktop-viewer.
+
+Cara kerja:
+  1. tracer.trace("battle")  → buka root span (per thread)
+  2. tracer.span("poll")     → child span dari span aktif
+  3. tracer.on_response      → hook requests.Session, catat span HTTP
+                               (method, path, status, durasi) otomatis
+  4. Saat root span selesai  → semua span ditulis sekaligus (1 write/battle)
+
+Di luar trace (mis. thread SessionKeeper), span & hook jadi no-op.
+"""
+
+import os, json, time, logging, threading
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+log = logging.getLogger("Tracing")
+
+SERVICE_NAME   = "molt-auto-battle"
+MAX_TRACE_FILE = 50 * 1024 * 1024   # rotasi ke .1 setelah 50 MB
+
+# OTLP enum
+KIND_INTERNAL = 1
+KIND_CLIENT   = 3
+STATUS_ERROR  = 2
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind",
+                 "start_ns", "end_ns", "attrs", "status", "message")
+
+    def __init__(self, trace_id: str, parent_id: str, name: str, kind: int = KIND_INTERNAL,
+                 start_ns: int | None = None, attrs: dict | None = None):
+        self.trace_id  = trace_id
+        self.span_id   = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name      = name
+        self.kind      = kind
+        self.start_ns  = start_ns or time.time_ns()
+        self.end_ns    = 0
+        self.attrs     = dict(attrs or {})
+        self.status    = 0
+        self.message   = ""
+
+    def set(self, key: str, value):
+        self.attrs[key] = value
+
+    def error(self, message: str):
+        self.status, self.message = STATUS_ERROR, str(message)[:200]
+
+    def to_otlp(self) -> dict:
+        d = {
+            "traceId":           self.trace_id,
+            "spanId":            self.span_id,
+            "name":              self.name,
+            "kind":              self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano":   str(self.end_ns or time.time_ns()),
+            "attributes":        [_attr(k, v) for k, v in self.attrs.items()],
+        }
+        if self.parent_id:
+            d["parentSpanId"] = self.parent_id
+        if self.status:
+            d["status"] = {"code": self.status, "message": self.message} if self.message \
+                          else {"code": self.status}
+        return d
+
+
+class _NullSpan:
+    """Dipakai saat tracing mati / di luar trace — semua method no-op."""
+    def set(self, key, value): pass
+    def error(self, message): pass
+
+_NULL = _NullSpan()
+
+
+def _attr(key: str, value) -> dict:
+    if isinstance(value, bool):
+        v = {"boolValue": value}
+    elif isinstance(value, int):
+        v = {"intValue": str(value)}
+    elif isinstance(value, float):
+        v = {"doubleValue": value}
+    else:
+        v = {"stringValue": str(value)}
+    return {"key": key, "value": v}
+
+
+class Tracer:
+    def __init__(self, path: str | Path, enabled: bool = True, service: str = SERVICE_NAME):
+        self.path     = Path(path)
+        self.enabled  = enabled
+        self.service  = service
+        self._local   = threading.local()
+        self._io_lock = threading.Lock()
+
+    # ── PUBLIC ────────────────────────────────────────────────
+
+    @contextmanager
+    def trace(self, name: str, **attrs):
+        """Root span — semua span di thread ini masuk ke trace ini sampai selesai."""
+        if not self.enabled or getattr(self._local, "spans", None) is not None:
+            with self.span(name, **attrs) as s:
+                yield s
+            return
+        root = Span(os.urandom(16).hex(), "", name, attrs=attrs)
+        self._local.spans = [root]
+        self._local.stack = [root]
+        try:
+            yield root
+        except BaseException as e:
+            root.error(str(e) or type(e).__name__)
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            spans = self._local.spans
+            self._local.spans = self._local.stack = None
+            self._export(spans)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        stack = getattr(self._local, "stack", None)
+        if not self.enabled or not stack:
+            yield _NULL
+            return
+        parent = stack[-1]
+        s = Span(parent.trace_id, parent.span_id, name, attrs=attrs)
+        self._local.spans.append(s)
+        stack.append(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.error(str(e) or type(e).__name__)
+            raise
+        finally:
+            s.end_ns = time.time_ns()
+            stack.pop()
+
+    def current(self):
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else _NULL
+
+    def on_response(self, r, *args, **kwargs):
+        """Hook `response` requests.Session — span HTTP dibuat mundur dari r.elapsed."""
+        stack = getattr(self._local, "stack", None)
+        if not self.enabled or not stack:
+            return r
+        end_ns = time.time_ns()
+        parent = stack[-1]
+        url    = urlsplit(r.url)
+        s = Span(parent.trace_id, parent.span_id, f"HTTP {r.request.method}", kind=KIND_CLIENT,
+                 start_ns=end_ns - int(r.elapsed.total_seconds() * 1e9),
+                 attrs={
+                     "http.request.method":       r.request.method,
+                     "server.address":            url.hostname or "",
+                     "url.path":                  url.path,
+                     "http.response.status_code": r.status_code,
+                 })
+        s.end_ns = end_ns
+        if r.status_code >= 400:
+            s.status = STATUS_ERROR
+        self._local.spans.append(s)
+        return r
+
+    # ── PRIVATE ───────────────────────────────────────────────
+
+    def _export(self, spans: list):
+        line = json.dumps({"resourceSpans": [{
+            "resource": {"attributes": [_attr("service.name", self.service)]},
+            "scopeSpans": [{
+                "scope": {"name": "molt_auto_battle"},
+                "spans": [s.to_otlp() for s in spans],
+            }],
+        }]}, separators=(",", ":"))
+        try:
+            with self._io_lock:
+                if self.path.exists() and self.path.stat().st_size > MAX_TRACE_FILE:
+                    self.path.replace(self.path.with_name(self.path.name + ".1"))
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception as e:
+            log.debug(f"  Gagal tulis trace: {e}")